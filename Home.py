@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
+import time
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-from src.database import DataRepository
+from src._runtime import get_repo
 from src.utils.forex_processor import ForexProcessor
 from src.utils.gwcpi.processor import GWCPIProcessor
+from src.utils.chart import resampled_figure
 
 # 1. 페이지 설정
 st.set_page_config(page_title="Gunuberg Dashboard", layout="wide", page_icon="🚀")
@@ -24,60 +27,93 @@ st.caption("Macro Insights: Real Value vs Inflation (Auto-Sync Mode)")
 # 3. 데이터 로드 및 초기화
 @st.cache_resource
 def get_processors():
-    repo = DataRepository() # 이제 여기서 HF 동기화/자동갱신 다 알아서 함
-    return ForexProcessor(repo), GWCPIProcessor(repo)
+    repo = get_repo() # 모든 페이지가 공유하는 싱글톤 (HF 동기화/자동갱신 다 알아서 함)
+    return repo, ForexProcessor(repo), GWCPIProcessor(repo)
 
-forex_processor, gwcpi_processor = get_processors()
+repo, forex_processor, gwcpi_processor = get_processors()
 
 # -------------------------------------------------------------------
-# 🔄 데이터 수집 (스피너는 데이터가 없을 때만 돌도록 됨)
+# 📊 데이터 가공 (Merge & Normalize) - 결과 캐싱
 # -------------------------------------------------------------------
-with st.spinner("데이터 동기화 및 분석 중..."):
+# 위젯 조작(Monthly/Daily 전환 등)마다 병합/보간/정규화를 다시 돌지 않도록 캐싱.
+# data_version(이 화면이 읽는 DXY/환율/물가 파일의 갱신 시각)이 바뀌면 캐시가 자동으로 무효화됨.
+# 수집 실패(빈 결과)는 캐싱하지 않도록 예외로 알림 -> 다음 실행에서 다시 시도
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_merged(data_version: tuple) -> pd.DataFrame:
     # 옵션 없이 호출해도 Smart Repository가 알아서 쿨타임/이어붙이기 판단
     df_krw = forex_processor.get_real_krw_value()
     df_cpi = gwcpi_processor.get_gwcpi()
 
-# -------------------------------------------------------------------
-# 📊 데이터 가공 (Merge & Normalize)
-# -------------------------------------------------------------------
-if not df_krw.empty and not df_cpi.empty:
+    if df_krw.empty or df_cpi.empty:
+        raise ValueError("환율 또는 물가 데이터를 가져오지 못했습니다.")
+
     # 1. 병합
     merged = pd.merge(df_krw, df_cpi, on='date', how='outer').sort_values('date')
-    
+
     # 2. 결측치 보간 (선형 보간 -> 앞뒤 채우기)
+    # 컬럼별 루프 대신 프레임 단위로 한 번에 처리 (컬럼마다 Series 3개씩 만들지 않음)
     cols = ['real_krw_score', 'gwcpi', 'close_dxy', 'close_krw']
-    for c in cols:
-        if c in merged.columns:
-            merged[c] = merged[c].interpolate(method='linear').ffill().bfill()
+    present = [c for c in cols if c in merged.columns]
+    merged[present] = merged[present].interpolate(method='linear').ffill().bfill()
 
     # 3. 정규화 (0~100)
-    def normalize(series):
-        return ((series - series.min()) / (series.max() - series.min())) * 100
+    # 두 컬럼의 min/max를 2D 배열에서 한 번에 구하고, (a - min) * (100 / 범위) 한 식으로 변환
+    arr = merged[['real_krw_score', 'gwcpi']].to_numpy(dtype=float)
+    mn = np.nanmin(arr, axis=0)
+    scale = 100.0 / (np.nanmax(arr, axis=0) - mn)
+    merged[['norm_krw', 'norm_gwcpi']] = (arr - mn) * scale
+
+    # 4. 화면 표시용 숫자 컬럼은 float32로 축소 (유효숫자 7자리면 충분, 메모리/차트 전송량 절반)
+    float_cols = [c for c in ['norm_krw', 'norm_gwcpi', 'close_dxy', 'close_krw', 'real_krw_score', 'gwcpi'] if c in merged.columns]
+    merged[float_cols] = merged[float_cols].astype('float32')
 
-    merged['norm_krw'] = normalize(merged['real_krw_score'])
-    merged['norm_gwcpi'] = normalize(merged['gwcpi'])
+    # 5. 날짜를 DatetimeIndex로 한 번만 설정 (월간 resample 시 매번 임시 인덱스를 만들지 않도록)
+    return merged.set_index(pd.DatetimeIndex(merged.pop('date')))
 
+# -------------------------------------------------------------------
+# 🔄 데이터 수집 (스피너는 데이터가 없을 때만 돌도록 됨)
+# -------------------------------------------------------------------
+# 같은 세션의 재실행(라디오 전환 등)에서는 캐시 조회조차 건너뛰고 세션에 보관한 결과를 재사용.
+# 이 화면이 읽는 파일이 갱신되거나 1시간(load_merged ttl)이 지나면 키가 바뀌어 다시 로드함.
+# (DataFrame은 truthiness 판단이 안 되므로 `or` 대신 버전 키로 비교)
+# 수집에 실패하면 세션에 키를 남기지 않음 -> 다음 실행에서 바로 재시도 (직전에 성공한 결과가 있으면 그걸 표시)
+data_version = forex_processor.data_version() + (gwcpi_processor.data_version(),)
+merged_key = (data_version, int(time.time() // 3600))
+if st.session_state.get('home_merged_key') != merged_key:
+    with st.spinner("데이터 동기화 및 분석 중..."):
+        try:
+            st.session_state['home_merged'] = load_merged(data_version)
+            st.session_state['home_merged_key'] = merged_key
+        except ValueError as e:
+            print(f"❌ [Home] {e}")
+merged = st.session_state.get('home_merged', pd.DataFrame())
+
+if not merged.empty:
     # -------------------------------------------------------------------
     # 📈 섹션 1: 핵심 지표 (Metrics) - 최상단 배치
     # -------------------------------------------------------------------
-    latest = merged.iloc[-1]
-    prev = merged.iloc[-2] if len(merged) > 1 else latest
+    # KPI 4개(원화 점수/GWCPI/환율/DXY)의 마지막·직전 값만 필요 -> 해당 컬럼 ndarray에서 두 행만 언패킹
+    vals = merged[['norm_krw', 'gwcpi', 'close_krw', 'close_dxy']].to_numpy()
+    last_krw, last_gwcpi, last_usdkrw, last_dxy = vals[-1]
+    prev_krw, prev_gwcpi, prev_usdkrw, prev_dxy = vals[-2] if len(vals) > 1 else vals[-1]
 
     # 14년 전 비교 데이터
-    date_14y_ago = pd.to_datetime(latest['date']) - pd.DateOffset(years=14)
-    past_14y = merged[merged['date'] <= date_14y_ago]
+    # 날짜가 정렬되어 있으므로 이진 탐색으로 위치만 찾음 (불리언 마스크/필터링 복사본 없음)
+    dates = merged.index.to_numpy()
+    date_14y_ago = pd.Timestamp(dates[-1]) - pd.DateOffset(years=14)
+    idx_14y = np.searchsorted(dates, np.datetime64(date_14y_ago), side='right') - 1
     inflation_14y = 0.0
-    if not past_14y.empty:
-        past_val = past_14y.iloc[-1]['gwcpi']
-        inflation_14y = ((latest['gwcpi'] / past_val) - 1) * 100
+    if idx_14y >= 0:
+        past_val = merged['gwcpi'].to_numpy()[idx_14y]
+        inflation_14y = ((last_gwcpi / past_val) - 1) * 100
 
     # 5개의 컬럼으로 구성
     k1, k2, k3, k4, k5 = st.columns(5)
     
-    k1.metric("Real KRW Score", f"{latest['norm_krw']:.1f}", f"{latest['norm_krw']-prev['norm_krw']:.2f}", help="원화 실질 가치 (0~100)")
-    k2.metric("GWCPI (Inflation)", f"{latest['gwcpi']:.1f}", f"{latest['gwcpi']-prev['gwcpi']:.2f}", delta_color="inverse", help="글로벌 가중 물가 지수")
-    k3.metric("USD/KRW", f"{latest['close_krw']:,.0f}원", f"{latest['close_krw']-prev['close_krw']:.0f}원", delta_color="inverse")
-    k4.metric("Dollar Index (DXY)", f"{latest['close_dxy']:.2f}", f"{latest['close_dxy']-prev['close_dxy']:.2f}")
+    k1.metric("Real KRW Score", f"{last_krw:.1f}", f"{last_krw-prev_krw:.2f}", help="원화 실질 가치 (0~100)")
+    k2.metric("GWCPI (Inflation)", f"{last_gwcpi:.1f}", f"{last_gwcpi-prev_gwcpi:.2f}", delta_color="inverse", help="글로벌 가중 물가 지수")
+    k3.metric("USD/KRW", f"{last_usdkrw:,.0f}원", f"{last_usdkrw-prev_usdkrw:.0f}원", delta_color="inverse")
+    k4.metric("Dollar Index (DXY)", f"{last_dxy:.2f}", f"{last_dxy-prev_dxy:.2f}")
     k5.metric("14Y Inflation", f"{inflation_14y:.1f}%", f"{date_14y_ago.year}년 대비", delta_color="inverse", help="14년 간 누적 물가 상승률")
 
     st.divider()
@@ -93,41 +129,38 @@ if not df_krw.empty and not df_cpi.empty:
     
     # 데이터 다운샘플링 (Lag 해결의 핵심)
     if "Monthly" in view_mode:
-        chart_df = merged.resample('M', on='date').last().reset_index()
+        chart_df = merged.resample('ME').last()
     else:
         chart_df = merged # 전체 데이터 (Daily)
 
-    # 차트 그리기
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    # 차트 그리기 (Daily 모드도 화면에 필요한 포인트만 전송하도록 서버 측 다운샘플링)
+    fig = resampled_figure(make_subplots(specs=[[{"secondary_y": True}]]))
 
     # A. 원화 실질 가치 (Red)
     fig.add_trace(
         go.Scattergl( # Scattergl 사용 (GPU 가속)
-            x=chart_df['date'], y=chart_df['norm_krw'],
             name="원화 실질 가치 (Real KRW)",
             line=dict(color='#FF4B4B', width=2),
             mode='lines'
-        ), secondary_y=False
+        ), hf_x=chart_df.index, hf_y=chart_df['norm_krw'], secondary_y=False
     )
 
     # B. GWCPI (Blue)
     fig.add_trace(
         go.Scattergl(
-            x=chart_df['date'], y=chart_df['norm_gwcpi'],
             name="글로벌 물가 (GWCPI)",
             line=dict(color='#1E88E5', width=2),
             mode='lines'
-        ), secondary_y=False # 같은 축 사용 (0~100 정규화했으므로)
+        ), hf_x=chart_df.index, hf_y=chart_df['norm_gwcpi'], secondary_y=False # 같은 축 사용 (0~100 정규화했으므로)
     )
 
     # C. 환율 (Grey, 배경) - 선택 사항
     fig.add_trace(
         go.Scattergl(
-            x=chart_df['date'], y=chart_df['close_krw'],
             name="환율 (USD/KRW)",
             line=dict(color='rgba(128, 128, 128, 0.3)', width=1, dash='dot'),
             hoverinfo='y'
-        ), secondary_y=True
+        ), hf_x=chart_df.index, hf_y=chart_df['close_krw'], secondary_y=True
     )
 
     # 레이아웃 최적화
@@ -146,7 +179,8 @@ if not df_krw.empty and not df_cpi.empty:
     fig.update_yaxes(title_text="Score (0~100)", secondary_y=False, showgrid=True, gridcolor='rgba(200,200,200,0.2)')
     fig.update_yaxes(title_text="환율 (KRW)", secondary_y=True, showgrid=False)
 
-    st.plotly_chart(fig, use_container_width=True)
+    # 고정 key: 재실행 시 차트 요소를 새로 마운트하지 않고 같은 요소를 갱신
+    st.plotly_chart(fig, use_container_width=True, key='home_main_chart')
     
     st.info("💡 **팁**: 하단의 'Range Slider'를 조절하여 원하는 기간을 확대해 볼 수 있습니다. 'Monthly' 모드를 사용하면 로딩이 훨씬 빠릅니다.")
 
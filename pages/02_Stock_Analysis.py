@@ -4,9 +4,10 @@ import plotly.graph_objects as go
 # make_subplots는 이제 쓰지 않으므로 삭제해도 되지만, 혹시 모르니 남겨둡니다.
 from plotly.subplots import make_subplots
 
-from src.database import DataRepository
+from src._runtime import get_repo
 from src.utils.stock.processor import StockAnalysisProcessor
 from src.utils.ticker_manager import TickerManager
+from src.utils.chart import resampled_figure
 
 # 1. 페이지 설정
 st.set_page_config(page_title="Stock Deep Dive", layout="wide", page_icon="📈")
@@ -23,7 +24,7 @@ st.title("📈 주식 실질 가치 심층 분석")
 st.caption("Nominal Price vs Real Value (Inflation & Currency Adjusted)")
 
 # 2. 공통 Repository 및 Processor 생성
-repo = DataRepository()
+repo = get_repo()
 processor = StockAnalysisProcessor(repo)
 ticker_manager = TickerManager(repo)
 
@@ -32,20 +33,22 @@ ticker_manager = TickerManager(repo)
 # -------------------------------------------------------------------
 st.sidebar.header("🔍 종목 검색")
 
-ticker_map = ticker_manager.get_ticker_map()
+# 티커 맵 + selectbox 옵션 + 기본 선택(AAPL) 위치를 한 번에 계산해서 캐싱 (티커 맵의 유일한 캐시 계층)
+# (티커 파일이 갱신되면 tickers_version이 바뀌어 자동으로 다시 계산됨)
+@st.cache_data(ttl=86400, show_spinner=False)
+def load_ticker_options(tickers_version: float):
+    ticker_map = ticker_manager.get_ticker_map()
+    search_keys = list(ticker_map.keys())
+    default_idx = next((i for i, k in enumerate(search_keys) if "AAPL" in k), 0)
+    return ticker_map, search_keys, default_idx
+
+ticker_map, search_keys, default_idx = load_ticker_options(repo.file_version(ticker_manager.filename))
 
 if not ticker_map:
     st.sidebar.warning("종목 리스트를 불러오는 중입니다. 잠시 후 다시 시도하거나 직접 입력하세요.")
     target_ticker = st.sidebar.text_input("티커 직접 입력", value="AAPL").upper()
     selected_option = target_ticker
 else:
-    search_keys = list(ticker_map.keys())
-    default_idx = 0
-    for i, k in enumerate(search_keys):
-        if "AAPL" in k:
-            default_idx = i
-            break
-            
     selected_option = st.sidebar.selectbox(
         "종목 선택 (전 세계)",
         options=search_keys,
@@ -62,35 +65,39 @@ if st.sidebar.button("🔄 종목 리스트 최신화"):
 # -------------------------------------------------------------------
 if target_ticker:
     with st.spinner(f"'{selected_option}' 데이터 정밀 분석 중..."):
-        df = processor.get_analysis_data(target_ticker)
+        df = processor.get_analysis_data(target_ticker, data_version=processor.data_version(target_ticker))
 
     if df.empty:
         st.error(f"❌ '{target_ticker}' 데이터를 가져올 수 없습니다. (상장 폐지 또는 티커 오류)")
     else:
+        df = df.set_index(pd.DatetimeIndex(df.pop('date')))
+
         # --- [Step 1] 핵심 지표 (Metrics) ---
-        last = df.iloc[-1]
-        prev = df.iloc[-2] if len(df) > 1 else last
+        # 명목/실질/공정 가치의 최신·전일 값 (Metric 3개와 아래 Gap 계산에서 재사용)
+        vals = df[['close', 'close_real', 'close_currency_neutral']].to_numpy()
+        last_close, last_real, last_neutral = vals[-1]
+        prev_close, prev_real, prev_neutral = vals[-2] if len(vals) > 1 else vals[-1]
         
         m1, m2, m3 = st.columns(3)
         
         m1.metric(
             "현재 주가 (Nominal)", 
-            f"{last['close']:,.2f}", 
-            f"{(last['close']-prev['close'])/prev['close']*100:.2f}%"
+            f"{last_close:,.2f}", 
+            f"{(last_close-prev_close)/prev_close*100:.2f}%"
         )
         
         m2.metric(
             "실질 주가 (인플레 제거)", 
-            f"{last['close_real']:,.2f}", 
-            f"{(last['close_real']-prev['close_real'])/prev['close_real']*100:.2f}%", 
+            f"{last_real:,.2f}", 
+            f"{(last_real-prev_real)/prev_real*100:.2f}%", 
             help="물가 상승분을 제거한 구매력 기준 가치"
         )
         
-        label = last.get('currency_label', 'Converted')
+        label = df['currency_label'].iat[-1] if 'currency_label' in df.columns else 'Converted'
         m3.metric(
             f"공정 가치 ({label})", 
-            f"{last['close_currency_neutral']:,.2f}", 
-            f"{(last['close_currency_neutral']-prev['close_currency_neutral'])/prev['close_currency_neutral']*100:.2f}%",
+            f"{last_neutral:,.2f}", 
+            f"{(last_neutral-prev_neutral)/prev_neutral*100:.2f}%",
             help="환율 및 달러 인덱스(DXY) 거품을 제거한 본질 가치"
         )
         
@@ -102,7 +109,7 @@ if target_ticker:
             view_mode = st.radio("데이터 주기", ["Monthly (빠름)", "Daily (상세)"], index=0, horizontal=True)
         
         if "Monthly" in view_mode:
-            chart_df = df.resample('M', on='date').last().reset_index()
+            chart_df = df.resample('ME').last()
         else:
             chart_df = df
 
@@ -112,28 +119,26 @@ if target_ticker:
         # 1️⃣ 탭 1: 인플레이션 (Real vs Nominal)
         with tab1:
             st.markdown("##### 📉 물가를 뺀 '진짜 주가'는 얼마인가?")
-            fig1 = go.Figure()
+            fig1 = resampled_figure()
             
             fig1.add_trace(go.Scattergl(
-                x=chart_df['date'], y=chart_df['close'], 
                 name="명목 주가 (눈에 보이는 가격)", 
                 line=dict(color='gray', width=1)
-            ))
+            ), hf_x=chart_df.index, hf_y=chart_df['close'])
             
             fig1.add_trace(go.Scattergl(
-                x=chart_df['date'], y=chart_df['close_real'], 
                 name="실질 주가 (물가 반영)", 
                 line=dict(color='#00C853', width=2), 
                 fill='tozeroy', 
                 fillcolor='rgba(0, 200, 83, 0.1)'
-            ))
+            ), hf_x=chart_df.index, hf_y=chart_df['close_real'])
             
             fig1.update_layout(
                 height=500, hovermode="x unified",
                 legend=dict(orientation="h", y=1.02, x=1, xanchor="right"),
                 xaxis=dict(rangeslider=dict(visible=True), type="date")
             )
-            st.plotly_chart(fig1, use_container_width=True)
+            st.plotly_chart(fig1, use_container_width=True, key='stock_inflation_chart')
             
         # 2️⃣ 탭 2: 환율 (Currency Adjusted) - [핵심 수정: 단일 축 & Gap 표시]
         with tab2:
@@ -141,23 +146,21 @@ if target_ticker:
             
             # [변경] make_subplots 제거 -> 단일 Figure로 통일
             # 이유: 축을 하나로 써야 두 그래프 사이의 'Gap'이 왜곡 없이 보임
-            fig2 = go.Figure()
+            fig2 = resampled_figure()
             
             # A. 원래 주가 (Nominal) - 회색 점선
             fig2.add_trace(go.Scattergl(
-                x=chart_df['date'], y=chart_df['close'], 
                 name=f"현재 주가 (거품 포함)", 
                 line=dict(color='gray', width=1, dash='dot') 
-            ))
+            ), hf_x=chart_df.index, hf_y=chart_df['close'])
             
             # B. 공정 가치 (Fair Value) - 파란 실선 & Gap 색칠
             fig2.add_trace(go.Scattergl(
-                x=chart_df['date'], y=chart_df['close_currency_neutral'], 
                 name=f"공정 가치 ({label})", 
                 line=dict(color='#2962FF', width=2),
                 fill='tonexty', # 두 선 사이를 칠해서 'Gap' 시각화
                 fillcolor='rgba(41, 98, 255, 0.1)' 
-            ))
+            ), hf_x=chart_df.index, hf_y=chart_df['close_currency_neutral'])
             
             fig2.update_layout(
                 height=500, hovermode="x unified",
@@ -166,30 +169,35 @@ if target_ticker:
                 yaxis=dict(title="주가 (Price)") # 단일 축 사용
             )
             
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(fig2, use_container_width=True, key='stock_currency_chart')
 
             # [Gap 수치화] 그래프 하단에 괴리율 명시
-            curr_price = last['close']
-            fair_price = last['close_currency_neutral']
+            # 상단 Metric에서 뽑아둔 ndarray 행 값을 파이썬 float로 한 번에 계산 (pandas 조회 없음)
+            curr_price, fair_price = float(last_close), float(last_neutral)
             gap = curr_price - fair_price
-            gap_pct = (gap / fair_price) * 100
+            gap_pct = gap / fair_price * 100
+            is_bubble = gap > 0
+
+            # 표시 문자열은 한 번만 만들어 Metric/안내 문구에서 재사용
+            gap_pct_text = f"{gap_pct:.1f}%"
+            gap_abs_text = gap_pct_text if is_bubble else f"{-gap_pct:.1f}%"
             
             c_gap1, c_gap2 = st.columns([1, 3])
             
             with c_gap1:
                 st.metric(
                     "괴리율 (Bubble Gap)", 
-                    f"{gap_pct:.1f}%", 
+                    gap_pct_text, 
                     f"{gap:,.0f}",
                     delta_color="inverse" # 양수(거품)면 빨간색, 음수(할인)면 초록색
                 )
             
             with c_gap2:
-                if gap > 0:
-                    st.warning(f"🚨 현재 주가는 공정 가치보다 **{gap_pct:.1f}% 고평가(거품)** 상태입니다. (환율/달러 영향)")
+                if is_bubble:
+                    st.warning(f"🚨 현재 주가는 공정 가치보다 **{gap_abs_text} 고평가(거품)** 상태입니다. (환율/달러 영향)")
                 else:
-                    st.success(f"✅ 현재 주가는 공정 가치보다 **{abs(gap_pct):.1f}% 저평가(할인)** 상태입니다. (환율/달러 영향)")
+                    st.success(f"✅ 현재 주가는 공정 가치보다 **{gap_abs_text} 저평가(할인)** 상태입니다. (환율/달러 영향)")
 
         # (옵션) 상세 데이터
         with st.expander("📊 상세 데이터 테이블 보기"):
-            st.dataframe(df.sort_values('date', ascending=False).head(100), use_container_width=True)
\ No newline at end of file
+            st.dataframe(df.sort_index(ascending=False).head(100), use_container_width=True)
\ No newline at end of file
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import yfinance as yf
-from src.database import DataRepository
+from concurrent.futures import ThreadPoolExecutor
+from src._runtime import get_repo
 from src.utils.gwcpi.processor import GWCPIProcessor
 
 # 1. 페이지 설정
@@ -20,7 +22,7 @@ st.title("🎩 워렌 버핏의 채권 스캐너")
 st.caption("Warren Buffett's Medium-Term Bond Strategy: Safety, Yield, and Duration")
 
 # 2. 데이터 준비
-repo = DataRepository()
+repo = get_repo()
 gwcpi_processor = GWCPIProcessor(repo)
 
 @st.cache_data(ttl=3600)
@@ -44,28 +46,34 @@ def get_bond_data():
     }
 
     data = []
-    
+
     # 1. 국채 금리 수집
+    # 5개 지수를 티커별로 따로 요청하지 않고, 다중 티커 요청 한 번으로 일괄 다운로드
+    try:
+        hist = yf.download(list(tickers.values()), period="5d", group_by='ticker', threads=True, progress=False)
+    except Exception:
+        hist = pd.DataFrame()
+
     for name, ticker in tickers.items():
         try:
             # 국채 지수는 가격이 아니라 '수익률' 자체가 종가임 (단위: %)
             # 예: 4.5 -> 4.5%
-            hist = yf.Ticker(ticker).history(period="5d")
-            if not hist.empty:
-                yield_val = hist['Close'].iloc[-1]
-                prev_yield = hist['Close'].iloc[-2]
-                data.append({
-                    "Type": "Treasury",
-                    "Name": name,
-                    "Ticker": ticker,
-                    "Yield (%)": yield_val,
-                    "Change": yield_val - prev_yield,
-                    "Duration_Risk": "High" if "30Y" in name or "10Y" in name else "Low"
-                })
+            close = hist[ticker]['Close'].dropna()
+            yield_val, prev_yield = close.iloc[-1], close.iloc[-2]
+            data.append({
+                "Type": "Treasury",
+                "Name": name,
+                "Ticker": ticker,
+                "Yield (%)": yield_val,
+                "Change": yield_val - prev_yield,
+                "Duration_Risk": "High" if "30Y" in name or "10Y" in name else "Low"
+            })
         except: pass
-        
+
     # 2. ETF 배당 수익률(Yield) 수집
-    for name, ticker in etfs.items():
+    # .info는 일괄 조회가 안 되므로 티커별 HTTP 왕복을 스레드로 동시에 요청
+    def fetch_etf(item):
+        name, ticker = item
         try:
             info = yf.Ticker(ticker).info
             # yield는 0.045 형태로 옴 -> 4.5로 변환
@@ -73,18 +81,28 @@ def get_bond_data():
             if yield_val == 0:
                 # 데이터 없을 경우 trailingAnnualDividendYield 시도
                 yield_val = info.get('trailingAnnualDividendYield', 0) * 100
-                
-            data.append({
+
+            return {
                 "Type": "ETF",
                 "Name": name,
                 "Ticker": ticker,
                 "Yield (%)": yield_val,
                 "Change": 0.0, # ETF는 금리 변화 추적 어려움
                 "Duration_Risk": "Medium"
-            })
-        except: pass
+            }
+        except:
+            return None
+
+    # map은 입력 순서를 유지하므로 화면 표시 순서도 그대로
+    with ThreadPoolExecutor(max_workers=len(etfs)) as ex:
+        data += [row for row in ex.map(fetch_etf, etfs.items()) if row is not None]
 
-    return pd.DataFrame(data)
+    df = pd.DataFrame(data)
+    if not df.empty:
+        # 반복되는 라벨 문자열은 category로 저장 (메모리 절약)
+        df['Type'] = df['Type'].astype('category')
+        df['Duration_Risk'] = df['Duration_Risk'].astype('category')
+    return df
 
 # 데이터 로드
 df_bonds = get_bond_data()
@@ -122,76 +140,61 @@ st.divider()
 st.subheader("🕵️‍♂️ 채권 판독기 (Buffett Test)")
 st.caption("버핏의 3가지 조건: ①인플레 방어(실질금리 +) ②만기 10년 이하(리스크 관리) ③4% 이상 고금리")
 
-# 판독 로직
-results = []
-for index, row in df_bonds.iterrows():
-    score = 0
-    reasons = []
-    
-    # 1. Yield Check (vs Inflation)
-    real_yield = row['Yield (%)'] - inflation_rate
-    if real_yield > 0.5: # 실질 금리 0.5% 이상
-        score += 1
-        reasons.append("✅ 인플레 방어 가능")
-    else:
-        reasons.append("❌ 인플레 못 이김")
-        
-    # 2. Hurdle Check (vs 4%)
-    if row['Yield (%)'] >= 4.0:
-        score += 1
-        reasons.append("✅ 매력적인 금리(4%↑)")
-    else:
-        reasons.append("❌ 금리 매력 낮음")
-        
-    # 3. Duration Check (버핏은 장기채 싫어함)
-    if "30Y" in row['Name']:
-        score -= 1 # 감점
-        reasons.append("⚠️ 초장기채 위험(비선호)")
-    elif "10Y" in row['Name']:
-        reasons.append("⚠️ 장기채 주의")
-    else:
-        score += 1
-        reasons.append("✅ 만기 적절(중단기)")
-        
-    # 최종 판정
-    if score >= 3:
-        verdict = "💎 강력 매수 (Buffett Pick)"
-        color = "#e6fffa" # Light Green
-    elif score >= 1:
-        verdict = "🤔 관망 (Hold)"
-        color = "#fffaf0" # Light Orange
-    else:
-        verdict = "🗑️ 매도/회피 (Avoid)"
-        color = "#fff5f5" # Light Red
-        
-    results.append({
-        "상품명": row['Name'],
-        "현재 금리": f"{row['Yield (%)']:.2f}%",
-        "실질 금리": f"{real_yield:.2f}%",
-        "판정 결과": verdict,
-        "상세 분석": ", ".join(reasons),
-        "_color": color
-    })
+# 판독 로직 (iterrows 행 단위 분기 대신 컬럼 단위 불리언 연산으로 한 번에 계산)
+yields = df_bonds['Yield (%)']
+real_yield = yields - inflation_rate
+is_30y = df_bonds['Name'].str.contains('30Y')
+is_10y = df_bonds['Name'].str.contains('10Y')
+
+# 1. Yield Check (vs Inflation) - 실질 금리 0.5% 이상
+beats_inflation = real_yield > 0.5
+# 2. Hurdle Check (vs 4%)
+above_hurdle = yields >= 4.0
+# 3. Duration Check (버핏은 장기채 싫어함) - 초장기채 감점, 장기채 0점, 중단기 가점
+is_short = ~(is_30y | is_10y)
+
+score = beats_inflation.astype(int) + above_hurdle.astype(int) + is_short.astype(int) - is_30y.astype(int)
 
-df_result = pd.DataFrame(results)
+reasons = (
+    pd.Series(np.where(beats_inflation, "✅ 인플레 방어 가능", "❌ 인플레 못 이김"), index=df_bonds.index)
+    + ", " + np.where(above_hurdle, "✅ 매력적인 금리(4%↑)", "❌ 금리 매력 낮음")
+    + ", " + np.select([is_30y, is_10y], ["⚠️ 초장기채 위험(비선호)", "⚠️ 장기채 주의"], default="✅ 만기 적절(중단기)")
+)
+
+# 최종 판정
+verdict_conditions = [score >= 3, score >= 1]
+verdict = np.select(verdict_conditions, ["💎 강력 매수 (Buffett Pick)", "🤔 관망 (Hold)"], default="🗑️ 매도/회피 (Avoid)")
+color = np.select(verdict_conditions, ["#e6fffa", "#fffaf0"], default="#fff5f5") # Light Green / Light Orange / Light Red
+
+# 컬럼명은 itertuples 속성 접근이 가능한 식별자로 (상품명/현재 금리/실질 금리/판정 결과/상세 분석/배경색)
+df_result = pd.DataFrame({
+    "name": df_bonds['Name'],
+    "yield_text": yields.map("{:.2f}%".format),
+    "real_yield_text": real_yield.map("{:.2f}%".format),
+    "verdict": verdict,
+    "detail": reasons,
+    "color": color
+})
 
 # 테이블 그리기 (Color 적용)
-for i, r in df_result.iterrows():
-    with st.container():
-        st.markdown(f"""
-        <div style="background-color: {r['_color']}; padding: 15px; border-radius: 10px; margin-bottom: 10px; border: 1px solid #eee;">
-            <div style="display: flex; justify-content: space-between; align-items: center;">
-                <div>
-                    <h4 style="margin:0;">{r['상품명']}</h4>
-                    <span style="font-size: 0.9em; color: gray;">{r['상세 분석']}</span>
-                </div>
-                <div style="text-align: right;">
-                    <h3 style="margin:0; color: #333;">{r['현재 금리']}</h3>
-                    <div style="font-weight: bold;">{r['판정 결과']}</div>
-                </div>
-            </div>
+# 카드마다 st.markdown을 따로 호출하지 않고, HTML을 모아 한 번에 전송
+# (카드 사이에 빈 줄이 생기면 마크다운이 HTML 블록을 끊으므로 줄바꿈으로만 연결)
+cards_html = "\n".join(
+    f"""<div style="background-color: {r.color}; padding: 15px; border-radius: 10px; margin-bottom: 10px; border: 1px solid #eee;">
+    <div style="display: flex; justify-content: space-between; align-items: center;">
+        <div>
+            <h4 style="margin:0;">{r.name}</h4>
+            <span style="font-size: 0.9em; color: gray;">{r.detail}</span>
+        </div>
+        <div style="text-align: right;">
+            <h3 style="margin:0; color: #333;">{r.yield_text}</h3>
+            <div style="font-weight: bold;">{r.verdict}</div>
         </div>
-        """, unsafe_allow_html=True)
+    </div>
+</div>"""
+    for r in df_result.itertuples(index=False)
+)
+st.markdown(cards_html, unsafe_allow_html=True)
 
 # -------------------------------------------------------------------
 # 📈 섹션 3: 수익률 곡선 (Yield Curve)
@@ -224,7 +227,7 @@ with c1:
         yaxis_title="수익률 (%)",
         xaxis_title="만기 (Maturity)"
     )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, key='bond_yield_chart')
 
 with c2:
     st.info("""
@@ -0,0 +1,11 @@
+import streamlit as st
+from src.database import DataRepository
+
+
+@st.cache_resource
+def get_repo() -> DataRepository:
+    """
+    프로세스 전역 DataRepository 싱글톤
+    - 페이지 이동/재실행마다 새로 만들지 않고, 워커당 한 번만 생성 (HF 클라이언트/데이터 폴더 초기화 1회)
+    """
+    return DataRepository()
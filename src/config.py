@@ -1,5 +1,8 @@
 import streamlit as st
+import numpy as np
+import plotly.io as pio
 import os
+from functools import lru_cache
 from pathlib import Path
 
 # [Path Settings]
@@ -9,11 +12,18 @@ DATA_DIR = Path(os.path.join(BASE_DIR, "data"))
 # 데이터 폴더 생성
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# [Chart Serialization]
+# st.plotly_chart는 plotly.io.to_json으로 Figure를 직렬화함 -> 기본(표준 json) 대신 orjson 엔진 사용
+# (모든 페이지가 config를 import하므로 여기서 한 번 설정하면 전 페이지에 적용)
+pio.json.config.default_engine = "orjson"
+
 # [File Names]
 FILE_KRX_TICKERS = "krx_tickers.csv"
 
 # [Secret Management]
 # Hugging Face Secrets(환경변수)와 Streamlit 로컬 Secrets를 모두 지원하는 함수
+# 프로세스당 키별로 한 번만 조회 (재실행/핫리로드마다 st.secrets TOML을 다시 읽지 않도록)
+@lru_cache(maxsize=None)
 def get_secret(key, default=""):
     # 1. Hugging Face Spaces (환경 변수 우선 확인)
     # os.environ에서 값을 찾습니다. HF Secrets에 넣은 값은 여기로 들어옵니다.
@@ -53,3 +63,10 @@ OECD_CORE_SERIES = {
     "CAN": { "country_code": "CAN", "weight": 0.0314, "fred_id": "CANCPIALLMINMEI" },
     "KOR": { "country_code": "KOR", "weight": 0.0220, "fred_id": "KORCPIALLMINMEI" }
 }
+
+# GWCPI 가중합 계산용 병렬 배열 (import 시 한 번만 생성, 순서는 OECD_KEYS 기준)
+# 가중치는 합이 1이 되도록 미리 정규화 -> (T, 9) 물가 행렬 @ OECD_WEIGHTS 한 번으로 가중 평균
+OECD_KEYS = tuple(OECD_CORE_SERIES.keys())
+OECD_WEIGHTS = np.array([OECD_CORE_SERIES[k]['weight'] for k in OECD_KEYS], dtype=np.float64)
+OECD_WEIGHTS /= OECD_WEIGHTS.sum()
+OECD_FRED_IDS = tuple(OECD_CORE_SERIES[k]['fred_id'] for k in OECD_KEYS)
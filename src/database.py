@@ -1,10 +1,18 @@
 import pandas as pd
 import os
 import json
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 import streamlit as st
-from huggingface_hub import HfApi
+from pandas.api.types import is_datetime64_any_dtype
+from huggingface_hub import HfApi, CommitOperationAdd
+try:
+    import pyarrow.csv as pacsv # 멀티스레드 CSV 파서 (streamlit 의존성으로 함께 설치됨)
+except ImportError:
+    pacsv = None
 from src.config import DATA_DIR, HF_TOKEN, HF_DATASET_ID
 
 class DataRepository:
@@ -13,6 +21,8 @@ class DataRepository:
     - 파일 수정 시간(OS Time) 대신, 별도의 메타데이터(Last Checked)로 갱신 주기를 관리합니다.
     - 발표 주기가 긴 데이터(월간/분기)의 불필요한 API 호출을 원천 차단합니다.
     """
+    UPLOAD_BATCH_SECONDS = 30 # HF 업로드를 모아서 보내는 간격 (초)
+
     def __init__(self):
         self.data_dir = Path(DATA_DIR)
         if not self.data_dir.exists():
@@ -21,6 +31,24 @@ class DataRepository:
         self.api = HfApi(token=HF_TOKEN)
         self.repo_id = HF_DATASET_ID
 
+        # 파싱된 DataFrame 메모리 캐시 {경로: (파일 수정 시각, df)} - 재실행마다 디스크 재파싱 방지
+        self._mem_cache: dict[str, tuple[float, pd.DataFrame]] = {}
+
+        # HF 업로드는 반환값과 무관한 부수 작업 -> 대기열에 모았다가 일정 시간마다 커밋 한 번으로 묶어 전송
+        # {path_in_repo: CommitOperationAdd} (같은 파일을 여러 번 올리면 마지막 내용만 전송)
+        # 프로세스 종료 시에는 남은 대기열을 즉시 전송
+        self._pending_uploads: dict[str, CommitOperationAdd] = {}
+        self._upload_lock = threading.Lock()
+        self._upload_timer = None
+        atexit.register(self._flush_uploads)
+
+        # 쿨타임이 지난 파일의 API 갱신도 백그라운드에서 (stale-while-revalidate)
+        # 같은 파일에 대한 중복 갱신은 _refreshing(진행 중 파일명 집합)으로 막음
+        self._refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="repo-refresh")
+        self._refresh_lock = threading.Lock()
+        self._refreshing = set()
+        atexit.register(self._refresh_pool.shutdown, wait=False, cancel_futures=True)
+
     def get_data(self, filename: str, loader, check_interval_days: int = 0.00035, start_date=None, **kwargs) -> pd.DataFrame:
         """
         :param check_interval_days: 이 기간 내에는 재조회를 시도하지 않음 (발표 주기 고려)
@@ -28,38 +56,65 @@ class DataRepository:
         file_path = self.data_dir / filename
         meta_path = self.data_dir / f"{filename}.meta.json"
         
+        legacy_path = self._legacy_csv_path(file_path)
+
         # 1. 파일이 없으면 -> 무조건 신규 생성 (HF 복구 시도 포함)
-        if not file_path.exists():
+        if not file_path.exists() and not (legacy_path and legacy_path.exists()):
             if self._pull_from_hub(filename): # 데이터 복구
                 self._pull_from_hub(f"{filename}.meta.json") # 메타데이터도 같이 복구
+            elif legacy_path and self._pull_from_hub(legacy_path.name): # 구버전(CSV) 백업 복구 -> 로드 시 Parquet 변환
+                self._pull_from_hub(f"{legacy_path.name}.meta.json")
             else:
                 return self._fetch_and_save(filename, loader, meta_path, start_date=start_date, **kwargs)
 
-        # 2. 파일 로드
-        df_existing = self._load_csv(file_path)
+        # 2. 파일 로드 (수정 시각이 같으면 메모리 캐시의 얕은 복사본)
+        df_existing = self._load_table(file_path)
         if df_existing.empty:
              # 빈 껍데기만 있으면 다시 받음
              return self._fetch_and_save(filename, loader, meta_path, start_date=start_date, **kwargs)
 
         # 3. [핵심] 쿨타임(Last Checked) 확인
+        # (구버전 CSV였다면 방금 _load_table에서 메타도 새 파일명으로 옮겨졌으므로 로드 후에 읽음)
         last_checked = self._get_last_checked(meta_path)
-        
+
         # 아직 쿨타임 안 지났으면 -> 기존 데이터 리턴 (결측치가 있든 말든 신경 끄고 리턴)
         if datetime.now() - last_checked < timedelta(days=check_interval_days):
             # print(f"zzz [Repo] 쿨타임 중: {filename} (남은 시간: {timedelta(days=check_interval_days) - (datetime.now() - last_checked)})")
             return df_existing
 
         # -----------------------------------------------------------
-        # 여기 내려왔다는 건 쿨타임이 끝났다는 뜻 -> 이제야 API 호출 시도
+        # 여기 내려왔다는 건 쿨타임이 끝났다는 뜻 -> API 조회는 백그라운드로 넘기고
+        # 화면에는 기존 데이터를 바로 돌려줌 (갱신이 끝나면 파일이 바뀌어 다음 실행부터 반영)
         # -----------------------------------------------------------
-        
+        self._schedule_refresh(filename, loader, meta_path, df_existing, start_date, check_interval_days, kwargs)
+        return df_existing
+
+    def _schedule_refresh(self, filename, loader, meta_path, df_existing, start_date, check_interval_days, kwargs):
+        """파일별로 한 번만 백그라운드 갱신 예약 (이미 진행 중이면 무시)"""
+        with self._refresh_lock:
+            if filename in self._refreshing:
+                return
+            self._refreshing.add(filename)
+        try:
+            # 호출자에게 돌려주는 객체와 분리된 얕은 복사본을 넘김
+            # (호출자가 set_index(inplace=True) 등으로 자기 객체를 바꿔도 백그라운드 갱신이 'date' 컬럼을 잃지 않도록)
+            self._refresh_pool.submit(self._refresh_async, filename, loader, meta_path, df_existing.copy(deep=False), start_date, check_interval_days, kwargs)
+        except RuntimeError: # 종료 중(풀 shutdown 이후)
+            with self._refresh_lock:
+                self._refreshing.discard(filename)
+
+    def _refresh_async(self, filename, loader, meta_path, df_existing, start_date, check_interval_days, kwargs) -> pd.DataFrame:
+        """쿨타임 만료 후 API 조회 (과거 구멍 메우기 / 최신 이어붙이기 / 최신 확인 기록) - 백그라운드 실행"""
+        file_path = self.data_dir / filename
         try:
-            current_max_date = df_existing['date'].max() if 'date' in df_existing.columns else None
+            # 날짜 범위는 메타데이터에 기록된 값 사용 (구버전 메타에 없으면 데이터에서 계산)
+            current_min_date, current_max_date = self._get_date_range(meta_path)
+            if current_max_date is None and 'date' in df_existing.columns:
+                current_min_date, current_max_date = df_existing['date'].min(), df_existing['date'].max()
             today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
 
             # A. 과거 데이터 구멍 메우기 (이건 쿨타임 지났으니 한번 체크)
             if start_date:
-                current_min_date = df_existing['date'].min() if 'date' in df_existing.columns else None
                 req_start = pd.to_datetime(start_date).replace(tzinfo=None)
                 if current_min_date and current_min_date > req_start + timedelta(days=5):
                     print(f"🔄 [Repo] 과거 데이터 부족 발견 -> 전체 재수집")
@@ -85,8 +140,12 @@ class DataRepository:
                 if not df_new.empty:
                     df_new = self._ensure_date_format(df_new)
                     
-                    df_combined = pd.concat([df_existing, df_new])
-                    df_combined = df_combined.drop_duplicates(subset=['date'], keep='last').sort_values('date')
+                    # 날짜 인덱스 기준으로 신규 행과 겹치는 기존 행만 빼고 이어붙임
+                    # (전체 행을 해시/정렬하는 drop_duplicates 대신 신규 날짜만 조회)
+                    existing = df_existing.set_index('date')
+                    new = df_new.set_index('date')
+                    new = new[~new.index.duplicated(keep='last')]
+                    df_combined = pd.concat([existing.loc[existing.index.difference(new.index)], new]).sort_index().reset_index()
                     
                     self._save_and_push(file_path, df_combined, filename, meta_path)
                     return df_combined
@@ -106,6 +165,14 @@ class DataRepository:
         except Exception as e:
             print(f"❌ [Repo] 자동 갱신 중 오류 ({filename}): {e}")
             return df_existing
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(filename)
+
+    def file_version(self, filename: str) -> float:
+        """특정 데이터 파일의 수정 시각 (파일이 없으면 0.0) - 파일 단위 캐시 무효화용"""
+        file_path = self.data_dir / filename
+        return file_path.stat().st_mtime if file_path.exists() else 0.0
 
     # --- 내부 메서드 ---
 
@@ -123,67 +190,164 @@ class DataRepository:
     def _save_and_push(self, file_path, df, filename, meta_path):
         """데이터 저장 + 메타데이터 갱신 + 둘 다 업로드"""
         try:
-            # 1. 데이터 저장
-            df.to_csv(file_path, index=False)
+            # 1. 데이터 저장 (Parquet: 타입 보존 + zstd 압축으로 업로드 용량 축소)
+            # 백그라운드 갱신 중에도 다른 스레드가 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓰고 교체
+            tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+            df.to_parquet(tmp_path, index=False, engine='pyarrow', compression='zstd')
+            os.replace(tmp_path, file_path)
+            self._mem_cache.pop(str(file_path), None)
             
             # 2. 메타데이터(조회 시각) 갱신 및 저장
-            self._update_meta(meta_path)
+            self._update_meta(meta_path, df)
             
-            # 3. HF 업로드 (데이터 + 메타)
-            try:
-                self.api.upload_file(
-                    path_or_fileobj=file_path, path_in_repo=f"data/{filename}",
-                    repo_id=self.repo_id, repo_type="dataset"
-                )
-                self.api.upload_file(
-                    path_or_fileobj=meta_path, path_in_repo=f"data/{filename}.meta.json",
-                    repo_id=self.repo_id, repo_type="dataset"
-                )
-                # print(f"☁️ [Repo] 동기화 완료: {filename}")
-            except Exception: pass
+            # 3. HF 업로드 (데이터 + 메타) - 대기열에 추가
+            self._queue_upload(file_path, f"data/{filename}")
+            self._queue_upload(meta_path, f"data/{filename}.meta.json")
         except Exception: pass
 
     def _push_meta_only(self, filename, meta_path):
         """데이터는 그대로두고 메타데이터만 업로드 (조회 기록 갱신용)"""
+        self._queue_upload(meta_path, f"data/{filename}.meta.json")
+
+    def _queue_upload(self, local_path, path_in_repo):
+        """업로드 대기열에 추가하고, 타이머가 없으면 UPLOAD_BATCH_SECONDS 뒤 전송 예약"""
+        try:
+            # 파일 내용은 지금 시점으로 고정 (전송 전에 파일이 다시 바뀌어도 커밋 내용이 어긋나지 않도록)
+            op = CommitOperationAdd(path_in_repo=path_in_repo, path_or_fileobj=Path(local_path).read_bytes())
+        except Exception: return
+        with self._upload_lock:
+            self._pending_uploads[path_in_repo] = op
+            if self._upload_timer is None:
+                self._upload_timer = threading.Timer(self.UPLOAD_BATCH_SECONDS, self._flush_uploads)
+                self._upload_timer.daemon = True
+                self._upload_timer.start()
+
+    def _flush_uploads(self):
+        """대기 중인 업로드를 커밋 한 번으로 전송 (실패는 기존처럼 조용히 무시)"""
+        with self._upload_lock:
+            if self._upload_timer is not None:
+                self._upload_timer.cancel()
+                self._upload_timer = None
+            operations = list(self._pending_uploads.values())
+            self._pending_uploads.clear()
+        if not operations:
+            return
         try:
-            self.api.upload_file(
-                path_or_fileobj=meta_path, path_in_repo=f"data/{filename}.meta.json",
-                repo_id=self.repo_id, repo_type="dataset"
+            self.api.create_commit(
+                repo_id=self.repo_id, repo_type="dataset",
+                operations=operations, commit_message=f"batch sync ({len(operations)} files)"
             )
+            # print(f"☁️ [Repo] 동기화 완료: {len(operations)}개 파일")
         except Exception: pass
 
-    def _update_meta(self, meta_path):
-        """현재 시각을 Last Checked로 기록"""
+    def _update_meta(self, meta_path, df=None):
+        """
+        현재 시각을 Last Checked로 기록
+        - df를 넘기면(저장 시) 데이터의 날짜 범위(min/max)도 함께 기록, 아니면 기존 범위 유지
+        """
         meta = {"last_checked": datetime.now().isoformat()}
+        if df is not None and 'date' in df.columns and not df.empty:
+            meta["min_date"] = df['date'].min().isoformat()
+            meta["max_date"] = df['date'].max().isoformat()
+        else:
+            prev = self._read_meta(meta_path)
+            meta.update({k: prev[k] for k in ("min_date", "max_date") if k in prev})
         with open(meta_path, 'w') as f:
             json.dump(meta, f)
 
-    def _get_last_checked(self, meta_path):
-        """마지막 조회 시각 반환 (없으면 아주 옛날)"""
+    def _read_meta(self, meta_path) -> dict:
+        """메타데이터 JSON (없거나 깨졌으면 빈 dict)"""
         if not meta_path.exists():
-             return datetime.min
+            return {}
         try:
             with open(meta_path, 'r') as f:
-                data = json.load(f)
-                return datetime.fromisoformat(data['last_checked'])
+                return json.load(f)
+        except:
+            return {}
+
+    def _get_last_checked(self, meta_path):
+        """마지막 조회 시각 반환 (없으면 아주 옛날)"""
+        try:
+            return datetime.fromisoformat(self._read_meta(meta_path)['last_checked'])
         except:
             return datetime.min
 
+    def _get_date_range(self, meta_path):
+        """메타데이터에 기록된 데이터 날짜 범위 (min, max) - 기록이 없으면 (None, None)"""
+        meta = self._read_meta(meta_path)
+        try:
+            return pd.Timestamp(meta['min_date']), pd.Timestamp(meta['max_date'])
+        except:
+            return None, None
+
     def _pull_from_hub(self, filename):
         try:
             self.api.hf_hub_download(repo_id=self.repo_id, filename=f"data/{filename}", repo_type="dataset", local_dir=DATA_DIR.parent)
             return True
         except: return False
 
+    def _load_table(self, file_path) -> pd.DataFrame:
+        """Parquet 로드 (없으면 같은 이름의 구버전 CSV를 읽어 Parquet으로 1회 변환)"""
+        if file_path.exists():
+            # 파일이 그대로면(수정 시각 동일) 메모리에 있는 파싱 결과를 얕은 복사로 반환
+            mtime = file_path.stat().st_mtime
+            cached = self._mem_cache.get(str(file_path))
+            if cached and cached[0] == mtime:
+                return cached[1].copy(deep=False)
+            try:
+                df = self._ensure_date_format(pd.read_parquet(file_path))
+            except: return pd.DataFrame()
+            self._mem_cache[str(file_path)] = (mtime, df)
+            return df.copy(deep=False)
+
+        legacy_path = self._legacy_csv_path(file_path)
+        if not (legacy_path and legacy_path.exists()):
+            return pd.DataFrame()
+
+        df = self._load_csv(legacy_path)
+        if not df.empty:
+            try:
+                df.to_parquet(file_path, index=False, engine='pyarrow', compression='zstd')
+                # 메타데이터(쿨타임)도 새 파일명으로 이전하고 구버전 CSV 정리
+                legacy_meta = self.data_dir / f"{legacy_path.name}.meta.json"
+                if legacy_meta.exists():
+                    legacy_meta.replace(self.data_dir / f"{file_path.name}.meta.json")
+                legacy_path.unlink()
+                print(f"📦 [Repo] CSV -> Parquet 변환: {file_path.name}")
+            except Exception as e:
+                print(f"❌ [Repo] Parquet 변환 실패 ({file_path.name}): {e}")
+        return df
+
+    def _legacy_csv_path(self, file_path):
+        """Parquet 파일에 대응하는 구버전 CSV 경로 (Parquet이 아니면 None)"""
+        return file_path.with_suffix('.csv') if file_path.suffix == '.parquet' else None
+
     def _load_csv(self, file_path) -> pd.DataFrame:
+        # 1순위: pyarrow CSV 리더 (컬럼 병렬 파싱 + 날짜 컬럼을 읽는 시점에 timestamp로 변환)
+        if pacsv is not None:
+            try:
+                table = pacsv.read_csv(
+                    file_path,
+                    convert_options=pacsv.ConvertOptions(strings_can_be_null=True)
+                )
+                # 이미 tz 없는 datetime으로 읽혔으면 _ensure_date_format에서 재파싱 생략
+                return self._ensure_date_format(table.to_pandas(coerce_temporal_nanoseconds=True))
+            except Exception: pass
+
+        # 2순위: pandas 기본 파서 (pyarrow 미설치/파싱 실패 시)
         try:
             df = pd.read_csv(file_path)
             return self._ensure_date_format(df)
         except: return pd.DataFrame()
 
     def _ensure_date_format(self, df) -> pd.DataFrame:
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'])
-            if df['date'].dt.tz is not None:
-                df['date'] = df['date'].dt.tz_localize(None)
+        col = df.get('date')
+        if col is None:
+            return df
+        # 이미 tz 없는 datetime64면 그대로 (Parquet/pyarrow 로드, 로더 반환값 대부분이 여기서 끝남)
+        if is_datetime64_any_dtype(col) and col.dt.tz is None:
+            return df
+        df['date'] = pd.to_datetime(col)
+        if df['date'].dt.tz is not None:
+            df['date'] = df['date'].dt.tz_localize(None)
         return df
\ No newline at end of file
@@ -5,9 +5,45 @@ from io import BytesIO
 import re
 import streamlit as st
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fredapi import Fred
 from src.interfaces import IDataLoader
-from src.config import OECD_CORE_SERIES, FRED_API_KEY
+from src.config import OECD_CORE_SERIES, OECD_KEYS, OECD_FRED_IDS, FRED_API_KEY
+
+# e-Stat 엑셀 헤더에서 국가 컬럼을 찾기 위한 키워드 (공백 제거 후 비교)
+COUNTRY_KEYWORDS = {
+    'USA': ['UnitedStates', 'アメリカ'],
+    'JPN': ['Japan', '日本'],
+    'KOR': ['Korea', '韓国'], 
+    'GBP': ['UnitedKingdom', 'イギリス'],
+    'CAN': ['Canada', 'カナダ'],
+    'CHN': ['China', '中国'],
+    'DEU': ['Germany', 'ドイツ'],
+    'FRA': ['France', 'フランス'],
+    'ITA': ['Italy', 'イタリア'],
+}
+
+# 통화별 키워드를 하나의 정규식(alternation)으로 미리 컴파일 (import 시 1회)
+# 키워드가 없는 국가 코드는 원래처럼 매칭 대상에서 빠짐
+CURRENCY_PATTERNS = {
+    currency: re.compile('|'.join(map(re.escape, COUNTRY_KEYWORDS[info['country_code']])))
+    for currency, info in OECD_CORE_SERIES.items()
+    if COUNTRY_KEYWORDS.get(info['country_code'])
+}
+
+# 엑셀 리더: Rust 기반 calamine이 있으면 사용 (openpyxl 대비 수 배 빠름), 없으면 openpyxl
+try:
+    import python_calamine
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
+
+# 엑셀 셀 정규화용 상수 (import 시 1회 생성)
+_RE_YEAR = re.compile(r'(\d{4})')
+_RE_MONTH = re.compile(r'(\d{1,2})')
+# 헤더: 공백류 제거 / 값: 마이너스 기호 통일 + 별표/공백 제거 (str.translate 한 번으로 처리)
+_HEADER_TABLE = str.maketrans('', '', ' \u3000\n\xa0')
+_VALUE_TABLE = str.maketrans({'▲': '-', '－': '-', '−': '-', '*': None, ' ': None})
 
 class OECD_CSV_Loader(IDataLoader):
     """
@@ -21,7 +57,7 @@ class OECD_CSV_Loader(IDataLoader):
         
         # ✅ 변경: 디버그 모드는 기본적으로 끄거나, 필요하면 print로 대체
         self.debug_mode = False 
-        
+
         try:
             self.fred = Fred(api_key=FRED_API_KEY)
         except Exception as e:
@@ -74,68 +110,85 @@ class OECD_CSV_Loader(IDataLoader):
 
     def _fetch_from_fred(self, start_date, end_date) -> pd.DataFrame:
         if not self.fred: return pd.DataFrame()
+        calc_start = (pd.to_datetime(start_date) - pd.DateOffset(years=1)).strftime('%Y-%m-%d')
+        if pd.to_datetime(calc_start) > pd.to_datetime(end_date): return pd.DataFrame()
+
+        # 설정 순서의 (통화, FRED ID) 쌍은 config에서 import 시 한 번만 만들어 둔 병렬 배열 사용
+        targets = [(currency, fred_id) for currency, fred_id in zip(OECD_KEYS, OECD_FRED_IDS) if fred_id]
         all_series = {}
-        
-        for currency, info in OECD_CORE_SERIES.items():
-            fred_id = info.get('fred_id')
-            if not fred_id: continue
-            try:
-                calc_start = (pd.to_datetime(start_date) - pd.DateOffset(years=1)).strftime('%Y-%m-%d')
-                if pd.to_datetime(calc_start) > pd.to_datetime(end_date): continue
-                
-                series = self.fred.get_series(fred_id, observation_start=calc_start, observation_end=end_date)
-                series_yoy = series.pct_change(periods=12) * 100
-                series_yoy.name = currency
-                all_series[currency] = series_yoy
-            except: pass
+
+        # 시리즈별 HTTP 요청은 서로 독립 -> 동시에 보내고 끝나는 대로 수집
+        with ThreadPoolExecutor(max_workers=min(8, len(targets))) as ex:
+            futures = {
+                ex.submit(self.fred.get_series, fred_id, observation_start=calc_start, observation_end=end_date): currency
+                for currency, fred_id in targets
+            }
+            for fut in as_completed(futures):
+                try:
+                    all_series[futures[fut]] = fut.result()
+                except: pass
 
         if not all_series: return pd.DataFrame()
-        df = pd.DataFrame(all_series).reset_index().rename(columns={'index':'date'})
+        # 완료 순서와 무관하게 설정 파일 순서로 컬럼 정렬한 원지수 프레임을 만든 뒤
+        # 전년동월비(YoY, 12개월 전 대비 %)는 프레임 전체에 한 번에 계산
+        raw = pd.DataFrame({c: all_series[c] for c, _ in targets if c in all_series}).sort_index()
+        yoy = (raw / raw.shift(12) - 1) * 100
+        df = yoy.rename_axis('date').reset_index()
         return df[df['date'] >= start_date]
 
     def _fetch_from_estat(self, start_date, end_date) -> pd.DataFrame:
-        all_dfs = []
-        base_url = "https://www.e-stat.go.jp/stat-search/files"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        
         start_year = pd.to_datetime(start_date).year
         end_year = pd.to_datetime(end_date).year
         target_years = range(start_year, end_year + 1)
 
-        for year in target_years:
-            target_link = None
-            try:
-                # 정밀 검색
-                params = {
-                    'page': '1', 'query': '主要国の消費者物価指数変化率', 'layout': 'dataset',
-                    'toukei': '00200573', 'tstat': '000001150147', 'cycle': '1',
-                    'year': f"{year}0", 'tclass1': '000001150149', 'cycle_facet': 'tclass1',
-                    'tclass2val': '0', 'metadata': '1', 'data': '0'
-                }
-                res = requests.get(base_url, params=params, headers=headers, timeout=10)
-                target_link = self._extract_excel_link(res.text)
-                
-                if not target_link:
-                    fallback_params = {
-                        'page': '1', 'query': f"主要国の消費者物価指数変化率 {year}年",
-                        'layout': 'dataset', 'metadata': '1', 'data': '0'
-                    }
-                    res = requests.get(base_url, params=fallback_params, headers=headers, timeout=10)
-                    target_link = self._extract_excel_link(res.text)
-
-                if target_link:
-                    r = requests.get(target_link, headers=headers, timeout=15)
-                    if r.status_code == 200:
-                        df_year = self.parse_year_specific(BytesIO(r.content), year)
-                        if not df_year.empty:
-                            all_dfs.append(df_year)
-            except: pass
+        # 연도별 검색/다운로드는 서로 독립적인 네트워크 대기이므로 병렬로 요청
+        # 세션은 실제 e-Stat 조회 때만 만들고 연도별 스레드가 공유 (TCP/TLS 연결 재사용), 끝나면 닫음
+        all_dfs = []
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=min(8, len(target_years))) as ex:
+            session.headers.update({'User-Agent': 'Mozilla/5.0'})
+            futures = [ex.submit(self._fetch_single_year, year, session) for year in target_years]
+            for fut in as_completed(futures):
+                df_year = fut.result()
+                if not df_year.empty:
+                    all_dfs.append(df_year)
             
         if not all_dfs: return pd.DataFrame()
-        merged = pd.concat(all_dfs).drop_duplicates(subset=['date'], keep='last').sort_values('date')
+        # 연도별 프레임은 서로 날짜가 겹치지 않으므로 중복 제거 없이 이어붙인 뒤 안정 정렬만 수행
+        # (최종 중복 제거는 fetch_data에서 FRED 구간과 합칠 때 한 번만)
+        merged = pd.concat(all_dfs, ignore_index=True).sort_values('date', kind='mergesort')
         mask = (merged['date'] >= start_date) & (merged['date'] <= end_date)
         return merged.loc[mask]
 
+    def _fetch_single_year(self, year, session) -> pd.DataFrame:
+        """특정 연도의 e-Stat 엑셀을 찾아 내려받고 파싱 (실패 시 빈 DataFrame)"""
+        base_url = "https://www.e-stat.go.jp/stat-search/files"
+        timeout = (5, 15) # (connect, read)
+        try:
+            # 정밀 검색
+            params = {
+                'page': '1', 'query': '主要国の消費者物価指数変化率', 'layout': 'dataset',
+                'toukei': '00200573', 'tstat': '000001150147', 'cycle': '1',
+                'year': f"{year}0", 'tclass1': '000001150149', 'cycle_facet': 'tclass1',
+                'tclass2val': '0', 'metadata': '1', 'data': '0'
+            }
+            res = session.get(base_url, params=params, timeout=timeout)
+            target_link = self._extract_excel_link(res.text)
+            
+            if not target_link:
+                fallback_params = {
+                    'page': '1', 'query': f"主要国の消費者物価指数変化率 {year}年",
+                    'layout': 'dataset', 'metadata': '1', 'data': '0'
+                }
+                res = session.get(base_url, params=fallback_params, timeout=timeout)
+                target_link = self._extract_excel_link(res.text)
+
+            if target_link:
+                r = session.get(target_link, timeout=timeout)
+                if r.status_code == 200:
+                    return self.parse_year_specific(BytesIO(r.content), year)
+        except: pass
+        return pd.DataFrame()
+
     def _extract_excel_link(self, html_text):
         soup = BeautifulSoup(html_text, 'html.parser')
         for a in soup.find_all('a', href=True):
@@ -148,64 +201,57 @@ class OECD_CSV_Loader(IDataLoader):
 
     def parse_year_specific(self, f, target_year: int) -> pd.DataFrame:
         try:
-            df = pd.read_excel(f, header=None, engine='openpyxl')
+            df = pd.read_excel(f, header=None, engine=EXCEL_ENGINE)
             best_header_row = -1
             best_map = {}
             max_matches = 0
+
+            # 후보 헤더 행(5~24)을 한 번에 문자열화 + 공백류 제거
+            header_block = df.iloc[5:25].astype(str).apply(lambda col: col.str.translate(_HEADER_TABLE))
             
-            for r in range(5, 25): 
-                if r >= len(df): break
-                row_vals = [str(v).replace(' ', '').replace('\u3000', '').replace('\n', '').replace('\xa0', '') for v in df.iloc[r].values]
+            for r, row_vals in header_block.iterrows():
+                # 통화별로 행 전체를 정규식 한 번에 검사 -> 처음 매칭된 컬럼 위치
                 temp_map = {}
-                matches_count = 0
-                for currency, info in OECD_CORE_SERIES.items():
-                    code = info['country_code']
-                    keywords = self.get_country_keywords(code)
-                    for c, val_clean in enumerate(row_vals):
-                        for k in keywords:
-                            if k in val_clean:
-                                temp_map[currency] = c
-                                matches_count += 1
-                                break
-                        if currency in temp_map: break
-                if matches_count > max_matches:
-                    max_matches = matches_count
+                for currency, pattern in CURRENCY_PATTERNS.items():
+                    hits = row_vals.str.contains(pattern)
+                    if hits.any():
+                        temp_map[currency] = hits.idxmax()
+                if len(temp_map) > max_matches:
+                    max_matches = len(temp_map)
                     best_header_row = r
                     best_map = temp_map
             
             if best_header_row == -1: return pd.DataFrame()
 
-            data = []
-            for i in range(best_header_row + 1, len(df)):
-                row = df.iloc[i]
-                dt = self.parse_date(str(row[0]).strip(), target_year)
-                
-                if dt and dt.year == target_year:
-                    row_data = {'date': dt}
-                    has_val = False
-                    for currency, col_idx in best_map.items():
-                        try:
-                            raw_val = str(row[col_idx]).strip()
-                            raw_val = raw_val.replace('▲', '-').replace('－', '-').replace('−', '-')
-                            raw_val = raw_val.replace('*', '').replace(' ', '')
-                            
-                            if raw_val == '-' or raw_val == '':
-                                continue
-
-                            val = float(raw_val)
-                            row_data[currency] = val
-                            has_val = True
-                        except: pass
-                    if has_val: data.append(row_data)
-            return pd.DataFrame(data)
+            body = df.iloc[best_header_row + 1:]
+
+            # 날짜: 첫 컬럼만 행별 파싱 (대상 연도 행만 사용)
+            dates = body[0].map(lambda t: self.parse_date(str(t).strip(), target_year))
+            in_year = dates.map(lambda dt: dt is not None and dt.year == target_year).astype(bool)
+
+            # 값: 통화 컬럼 블록을 한 번에 정리 (▲/전각 마이너스 -> '-', 앞뒤 공백/별표/공백 제거) 후 숫자 변환
+            # '-'나 빈 칸 등 숫자가 아닌 값은 NaN
+            sub = body[list(best_map.values())]
+            sub.columns = list(best_map)
+            sub = (
+                sub.astype(str)
+                .apply(lambda col: col.str.strip().str.translate(_VALUE_TABLE))
+                .apply(pd.to_numeric, errors='coerce')
+            )
+
+            # 날짜가 유효하고 값이 하나라도 있는 행만
+            keep = in_year & sub.notna().any(axis=1)
+            result = sub[keep].reset_index(drop=True)
+            result.insert(0, 'date', pd.to_datetime(list(dates[keep])))
+            return result
         except: return pd.DataFrame()
 
     def parse_date(self, text, target_year_context):
         text = str(text).strip()
         try:
             if '平均' in text or 'Average' in text: return None
-            y_match = re.search(r'(\d{4})', text)
-            m_match = re.search(r'(\d{1,2})', text.split('年')[-1]) if '年' in text else None
+            y_match = _RE_YEAR.search(text)
+            m_match = _RE_MONTH.search(text.split('年')[-1]) if '年' in text else None
             
             if y_match and '月' in text and m_match:
                 y = int(y_match.group(1))
@@ -223,15 +269,4 @@ class OECD_CSV_Loader(IDataLoader):
         return None
 
     def get_country_keywords(self, code):
-        keywords = {
-            'USA': ['UnitedStates', 'アメリカ'],
-            'JPN': ['Japan', '日本'],
-            'KOR': ['Korea', '韓国'], 
-            'GBP': ['UnitedKingdom', 'イギリス'],
-            'CAN': ['Canada', 'カナダ'],
-            'CHN': ['China', '中国'],
-            'DEU': ['Germany', 'ドイツ'],
-            'FRA': ['France', 'フランス'],
-            'ITA': ['Italy', 'イタリア'],
-        }
-        return keywords.get(code, [])
\ No newline at end of file
+        return COUNTRY_KEYWORDS.get(code, [])
@@ -12,23 +12,22 @@ class StockPriceLoader(IDataLoader):
         try:
             # yfinance download는 start는 포함, end는 제외함 (주의)
             # 따라서 end_date가 있으면 하루 더해서 요청하거나 그대로 사용
-            df = yf.download(ticker, start=start_date, end=end_date, progress=False)
+            # 단일 레벨 컬럼(multi_level_index=False)으로 받아 MultiIndex 후처리 없이 필요한 컬럼만 바로 선택
+            # (수정주가 auto_adjust=True는 기존 저장 데이터와 같은 기준을 유지하기 위해 그대로 사용)
+            df = yf.download(
+                ticker, start=start_date, end=end_date, progress=False,
+                auto_adjust=True, actions=False, threads=True,
+                group_by='column', multi_level_index=False
+            )
             
             if df.empty: return pd.DataFrame()
 
-            df = df.reset_index()
-            
-            # 멀티 인덱스 처리
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.droplevel(1)
+            # 날짜 오름차순 + 중복 제거를 저장 전에 한 번만 보장 (읽는 쪽에서는 매번 정렬하지 않음)
+            df = df[~df.index.duplicated(keep='last')].sort_index()
 
             # 컬럼명 통일 (소문자 date 필수)
-            df = df.rename(columns={'Date': 'date', 'Close': 'close', 'Volume': 'volume'})
-            
-            # 날짜 포맷 통일 (문자열)
-            df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-            
-            return df[['date', 'close', 'volume']]
+            # 날짜는 datetime64 그대로 반환 (문자열로 바꿨다가 Repository에서 다시 파싱하는 왕복 제거, tz 제거도 Repository에서)
+            return df.reset_index()[['Date', 'Close', 'Volume']].rename(columns={'Date': 'date', 'Close': 'close', 'Volume': 'volume'})
 
         except Exception as e:
             print(f"❌ Error fetching {ticker}: {e}")
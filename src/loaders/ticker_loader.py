@@ -1,5 +1,6 @@
 import pandas as pd
 import FinanceDataReader as fdr
+from concurrent.futures import ThreadPoolExecutor
 from src.interfaces import IDataLoader
 
 class TickerListLoader(IDataLoader):
@@ -7,32 +8,18 @@ class TickerListLoader(IDataLoader):
     [Ticker List Loader]
     - FinanceDataReader를 이용해 한국(KRX) 및 미국(NASDAQ, NYSE, AMEX) 전 종목 리스트를 수집합니다.
     """
+    MARKETS = ['KRX', 'NASDAQ', 'NYSE', 'AMEX']
+
     def fetch_data(self, **kwargs) -> pd.DataFrame:
         try:
-            all_dfs = []
-            
-            # 1. 한국 시장 (KRX: KOSPI + KOSDAQ)
-            # print("Loading KRX tickers...")
-            df_krx = fdr.StockListing('KRX')
-            df_krx = df_krx[['Code', 'Name', 'Market']]
-            df_krx['Country'] = 'KR'
-            all_dfs.append(df_krx)
-            
-            # 2. 미국 시장 (NASDAQ, NYSE, AMEX)
-            # print("Loading US tickers...")
-            for market in ['NASDAQ', 'NYSE', 'AMEX']:
-                try:
-                    df_us = fdr.StockListing(market)
-                    df_us = df_us[['Symbol', 'Name']]
-                    df_us.columns = ['Code', 'Name'] # 컬럼명 통일
-                    df_us['Market'] = market
-                    df_us['Country'] = 'US'
-                    all_dfs.append(df_us)
-                except Exception:
-                    continue # 특정 마켓 실패해도 진행
-                
-            if not all_dfs:
-                return pd.DataFrame()
+            # 시장별 목록 다운로드는 서로 독립적인 HTTP 요청 -> 동시에 받음 (결과 순서는 MARKETS 순서 유지)
+            with ThreadPoolExecutor(max_workers=len(self.MARKETS)) as ex:
+                results = list(ex.map(self._load_market, self.MARKETS))
+
+            # 한국 시장은 필수 (실패하면 기존처럼 전체 실패로 처리), 미국 시장은 실패해도 진행
+            if results[0] is None:
+                raise RuntimeError("KRX 종목 리스트를 받지 못했습니다.")
+            all_dfs = [df for df in results if df is not None]
 
             # 병합
             df_final = pd.concat(all_dfs, ignore_index=True)
@@ -47,4 +34,24 @@ class TickerListLoader(IDataLoader):
             return pd.DataFrame()
         except Exception as e:
             print(f"❌ 티커 리스트 다운로드 실패: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
+
+    def _load_market(self, market: str):
+        """시장 하나의 종목 리스트 (Code, Name, Market, Country) - 실패 시 None"""
+        try:
+            df = fdr.StockListing(market)
+            if market == 'KRX':
+                # 1. 한국 시장 (KRX: KOSPI + KOSDAQ)
+                df = df[['Code', 'Name', 'Market']]
+                df['Country'] = 'KR'
+            else:
+                # 2. 미국 시장 (NASDAQ, NYSE, AMEX)
+                df = df[['Symbol', 'Name']]
+                df.columns = ['Code', 'Name'] # 컬럼명 통일
+                df['Market'] = market
+                df['Country'] = 'US'
+            return df
+        except Exception as e:
+            if market == 'KRX':
+                print(f"❌ KRX 종목 리스트 다운로드 실패: {e}")
+            return None # 특정 마켓 실패해도 진행
@@ -0,0 +1,23 @@
+import plotly.graph_objects as go
+from plotly_resampler import FigureResampler
+from plotly_resampler.aggregation import LTTB
+
+# 트레이스당 브라우저로 보내는 최대 포인트 수 (이보다 짧은 시계열은 그대로 전송)
+MAX_CHART_POINTS = 2000
+
+
+def resampled_figure(figure: go.Figure = None) -> FigureResampler:
+    """
+    서버 측 다운샘플링(plotly-resampler) Figure 생성
+    - add_trace(..., hf_x=, hf_y=)로 넘긴 원본 데이터가 MAX_CHART_POINTS보다 길면
+      트레이스마다 LTTB로 골라낸 포인트만 브라우저로 전송합니다. (선 모양/극값 유지)
+    - Streamlit에는 Dash 콜백이 없으므로 확대 시 재집계는 하지 않고, 처음 집계된 포인트만 그립니다.
+    - 범례 이름이 바뀌지 않도록 [R] 접두어/집계 크기 표시는 끕니다.
+    """
+    return FigureResampler(
+        figure if figure is not None else go.Figure(),
+        default_n_shown_samples=MAX_CHART_POINTS,
+        default_downsampler=LTTB(),
+        resampled_trace_prefix_suffix=("", ""),
+        show_mean_aggregation_size=False,
+    )
@@ -8,6 +8,12 @@ class ForexProcessor:
         self.repo = repo
         # 야후 파이낸스용 로더 사용
         self.loader = StockPriceLoader() 
+        self.dxy_filename = "index_dxy.parquet"
+        self.krw_filename = "forex_usdkrw.parquet"
+
+    def data_version(self) -> tuple:
+        """DXY/환율 파일의 수정 시각 - 화면 캐시 키용 (다른 종목 파일이 갱신돼도 무효화되지 않도록 이 두 파일만)"""
+        return (self.repo.file_version(self.dxy_filename), self.repo.file_version(self.krw_filename))
 
     def get_real_krw_value(self) -> pd.DataFrame:
         """
@@ -20,14 +26,14 @@ class ForexProcessor:
         target_start_date = "1990-01-01"
 
         df_dxy = self.repo.get_data(
-            filename="index_dxy.csv",
+            filename=self.dxy_filename,
             loader=self.loader,
             ticker=TICKER_DXY,
             start_date=target_start_date  # 기간 명시 필수
         )
         
         df_krw = self.repo.get_data(
-            filename="forex_usdkrw.csv",
+            filename=self.krw_filename,
             loader=self.loader,
             ticker=TICKER_USDKRW,
             start_date=target_start_date  # 기간 명시 필수
@@ -37,21 +43,23 @@ class ForexProcessor:
             print("❌ 환율 또는 DXY 데이터를 가져오지 못했습니다.")
             return pd.DataFrame()
 
-        # 데이터 컬럼 통일 (close -> price)
-        df_dxy = df_dxy[['date', 'close']].rename(columns={'close': 'dxy'})
-        df_krw = df_krw[['date', 'close']].rename(columns={'close': 'krw'})
+        # 데이터 컬럼 통일 (date 인덱스의 종가 Series)
+        dxy = df_dxy.set_index('date')['close']
+        krw = df_krw.set_index('date')['close']
 
-        # ✅ [수정 2] Outer Join + Forward Fill
-        # 휴장일이 달라도 데이터가 유실되지 않도록 outer join 후 직전 값으로 채움
-        merged = pd.merge(df_dxy, df_krw, on='date', how='outer')
-        merged = merged.sort_values('date')
-        merged = merged.fillna(method='ffill').dropna() # 앞의 값으로 채우고, 그래도 없으면 삭제
+        # ✅ [수정 2] 합집합 날짜 + Forward Fill
+        # 휴장일이 달라도 데이터가 유실되지 않도록 두 날짜의 합집합에 맞춰 직전 값으로 채움
+        # (outer merge 대신 정렬된 합집합 인덱스로 reindex 한 번씩)
+        idx = dxy.index.union(krw.index)
+        dxy = dxy.reindex(idx).ffill()
+        krw = krw.reindex(idx).ffill()
 
         # 3. 계산 (DXY / KRW)
         # 값이 너무 작으므로 1000을 곱해서 보기 편하게 만듦 (선택사항)
-        merged['real_krw_score'] = (merged['dxy'] / merged['krw']) * 1000
-
-        # 컬럼 정리
-        merged = merged.rename(columns={'dxy': 'close_dxy', 'krw': 'close_krw'})
+        merged = pd.DataFrame({
+            'real_krw_score': (dxy / krw) * 1000,
+            'close_dxy': dxy,
+            'close_krw': krw,
+        }).dropna() # 앞의 값으로도 못 채운 구간(시작 부분)은 삭제
         
-        return merged[['date', 'real_krw_score', 'close_dxy', 'close_krw']]
+        return merged.rename_axis('date').reset_index()
@@ -1,19 +1,25 @@
 import pandas as pd
+import numpy as np
 from functools import reduce
 from src.database import DataRepository
 from src.loaders.macro_loader import OECD_CSV_Loader
-from src.config import OECD_CORE_SERIES
+from src.config import OECD_KEYS, OECD_WEIGHTS
 
 class GWCPIProcessor:
     def __init__(self, repo: DataRepository):
         self.repo = repo
         self.loader = OECD_CSV_Loader()
+        self.filename = "macro_combined_v2.parquet"
+
+    def data_version(self) -> float:
+        """매크로(물가) 파일의 수정 시각 - 화면 캐시 키용"""
+        return self.repo.file_version(self.filename)
 
     def get_gwcpi(self) -> pd.DataFrame:
         # 매크로 데이터는 자주 변하지 않으므로 7일 쿨타임 설정
         # Database 모듈은 이제 파일명을 몰라도 됩니다.
         df_all = self.repo.get_data(
-            filename="macro_combined_v2.csv",
+            filename=self.filename,
             loader=self.loader,
             required_years=20,
             check_interval_days=7  # 👈 여기서 정책 결정!
@@ -22,21 +28,23 @@ class GWCPIProcessor:
         if df_all is None or df_all.empty:
             return pd.DataFrame()
 
-        df_all = df_all.set_index('date').sort_index()
-        df_all = df_all.fillna(method='ffill')
+        # Repository가 돌려준 객체는 다른 곳(백그라운드 갱신 등)과 공유될 수 있으므로 제자리 변경 없이 새 프레임으로
+        # 로더가 날짜순으로 정렬/중복 제거해서 저장하므로 정렬은 어긋난 경우(구버전 파일 등)에만
+        df_all = df_all.set_index('date')
+        if not df_all.index.is_monotonic_increasing:
+            df_all = df_all.sort_index()
+        df_all = df_all.ffill()
 
-        df_all['gwcpi'] = 0.0
-        total_weight = 0.0
-        
-        for currency, info in OECD_CORE_SERIES.items():
-            if currency in df_all.columns:
-                weight = info['weight']
-                df_all['gwcpi'] += (df_all[currency] * weight)
-                total_weight += weight
+        # 통화별 루프 대신 (T, k) 물가 행렬 @ 가중치 벡터 한 번으로 가중 평균 계산
+        present = np.isin(OECD_KEYS, df_all.columns)
+        weights = OECD_WEIGHTS[present]
+        total_weight = weights.sum()
         
         if total_weight == 0:
             return pd.DataFrame()
 
-        df_all['gwcpi'] = df_all['gwcpi'] / total_weight
+        cols = [k for k, p in zip(OECD_KEYS, present) if p]
+        mat = df_all[cols].to_numpy(dtype=np.float64)
+        df_all['gwcpi'] = (mat @ weights) / total_weight
 
-        return df_all[['gwcpi']].reset_index()
\ No newline at end of file
+        return df_all[['gwcpi']].reset_index()
@@ -1,84 +1,190 @@
 import pandas as pd
 import numpy as np
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from src.database import DataRepository
 from src.loaders.stock_loader import StockPriceLoader
 from src.utils.gwcpi.processor import GWCPIProcessor
 from src.config import TICKER_USDKRW
+try:
+    from numba import njit
+except ImportError: # numba 미설치 시 같은 코드를 순수 파이썬 루프로 실행
+    def njit(*args, **kwargs):
+        return lambda f: f
 
 TICKER_DXY = "DX-Y.NYB"
 
+# 데이터가 없을 때 돌려줄 빈 결과 (컬럼/dtype을 정상 결과와 맞춰 화면 코드가 KeyError 없이 같은 경로로 처리)
+_SCHEMA = {
+    'date': 'datetime64[ns]', 'close': 'float32', 'volume': 'float64', 'usdkrw': 'float32', 'dxy': 'float32',
+    'gwcpi': 'float32', 'close_real': 'float32', 'close_currency_neutral': 'float32', 'currency_label': 'object',
+}
+_EMPTY = pd.DataFrame({c: pd.Series(dtype=t) for c, t in _SCHEMA.items()})
+
+
+class _NoStockData(Exception):
+    """주가 수집 실패 - 캐시 함수 밖으로 던져 빈 결과가 캐싱되지 않도록 함"""
+
+def _align_asof(dates: np.ndarray, src_dates: np.ndarray, src_vals: np.ndarray) -> np.ndarray:
+    """
+    dates의 각 날짜 시점에 유효한 src 값 (같은 날 또는 그 직전의 마지막 값, 앞쪽은 NaN)
+    - pd.merge_asof(direction='backward')와 같은 정렬 병합을 이진 탐색 한 번으로 처리
+      (join 해시 인덱스 + 별도 ffill 없이 직전 값이 자연히 채워짐)
+    - src의 NaN 값은 건너뛰어 직전 유효값이 쓰이도록 함
+    """
+    valid = ~np.isnan(src_vals)
+    src_dates, src_vals = src_dates[valid], src_vals[valid]
+    pos = np.searchsorted(src_dates, dates, side='right') - 1
+    return np.where(pos >= 0, src_vals[np.maximum(pos, 0)], np.nan) if len(src_vals) else np.full(len(dates), np.nan)
+
+
+@njit(cache=True)
+def _real_close_kernel(close, gwcpi):
+    """
+    실질 주가를 물가 지수 배열 없이 계산 (cumprod / 나눗셈 / 곱셈 임시 배열 없이)
+    - 로그 공간에서 누적: log(cpi_index[i]) = Σ log1p(gwcpi/100) / 365
+      (1에 가까운 수를 수천 번 곱할 때 생기는 반올림 오차 누적을 피함)
+    - close_real[i] = close[i] * exp(log_idx[-1] - log_idx[i])  (= 현재지수 / 과거지수)
+    - 누적/지수 계산은 float64로 수행하고, 결과 배열만 float32로 바로 씀 (별도 astype 패스 없음)
+    """
+    n = close.shape[0]
+    log_idx = np.empty(n)
+    acc = 0.0
+    for i in range(n):
+        acc += np.log1p(gwcpi[i] / 100.0) / 365.0
+        log_idx[i] = acc
+    close_real = np.empty(n, np.float32)
+    for i in range(n):
+        close_real[i] = close[i] * np.exp(acc - log_idx[i])
+    return close_real
+
+
+@njit(cache=True)
+def _neutral_krw_kernel(close, usdkrw, dxy, scale):
+    """한국 주식 공정 가치 close / usdkrw * dxy * scale 을 한 번의 루프로 (단계별 임시 배열 없음, 계산은 float64)"""
+    n = close.shape[0]
+    out = np.empty(n, np.float32)
+    for i in range(n):
+        out[i] = close[i] / usdkrw[i] * dxy[i] * scale
+    return out
+
+
+def _ffill(arr: np.ndarray) -> np.ndarray:
+    """NaN을 직전 유효값으로 채움 (맨 앞 NaN은 그대로) - 유효 위치 인덱스의 누적 최대값으로 한 번에 처리"""
+    idx = np.where(np.isnan(arr), 0, np.arange(len(arr)))
+    np.maximum.accumulate(idx, out=idx)
+    return arr[idx]
+
+
+def _ensure_sorted(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    date 오름차순 보장 - 로더/저장소가 정렬된 상태로 저장하므로 보통은 O(N) 확인만 하고 그대로 반환
+    (구버전 파일 등 예외적으로 어긋난 경우에만 정렬한 새 프레임 반환 - 저장소가 돌려준 객체는 공유될 수 있어 제자리 변경하지 않음)
+    """
+    if not df['date'].is_monotonic_increasing:
+        return df.sort_values('date')
+    return df
+
+
+def _fill_const(arr: np.ndarray, const: float) -> np.ndarray:
+    """남은 맨 앞 NaN(원본 데이터 시작 전 구간)을 기본값으로 채움 (제자리 putmask)"""
+    np.putmask(arr, np.isnan(arr), const)
+    return arr
+
+
 class StockAnalysisProcessor:
     def __init__(self, repo: DataRepository):
         self.repo = repo
         self.stock_loader = StockPriceLoader()
         self.gwcpi_processor = GWCPIProcessor(repo)
         
-    def get_analysis_data(self, ticker: str, period_years: int = 15) -> pd.DataFrame:
-        # 1. 데이터 로드
-        df_stock = self.repo.get_data(f"stock_{ticker}.csv", self.stock_loader, ticker=ticker, start_date="1990-01-01")
-        if df_stock.empty: return pd.DataFrame()
+    def data_version(self, ticker: str) -> float:
+        """종목 주가 파일의 수정 시각 - get_analysis_data 캐시 키로 넘겨 백그라운드 갱신이 끝나면 다시 계산되도록"""
+        return self.repo.file_version(f"stock_{ticker}.parquet")
 
-        df_forex = self.repo.get_data("forex_usdkrw.csv", self.stock_loader, ticker=TICKER_USDKRW, start_date="1990-01-01")
-        df_dxy = self.repo.get_data("forex_dxy.csv", self.stock_loader, ticker=TICKER_DXY, start_date="1990-01-01")
-        df_gwcpi = self.gwcpi_processor.get_gwcpi() # 이건 '상승률(%)' 데이터임
+    def get_analysis_data(self, ticker: str, period_years: int = 15, data_version: float = 0.0) -> pd.DataFrame:
+        """종목 분석 결과 (주가를 가져오지 못하면 컬럼/dtype이 같은 빈 프레임 - 실패는 캐싱하지 않아 다음 실행에서 재시도)"""
+        try:
+            return self._build_analysis_data(ticker, period_years, data_version)
+        except _NoStockData:
+            return _EMPTY.copy()
+
+    # 종목별 분석 결과 캐싱 (위젯 조작마다 재계산하지 않음)
+    # data_version(주가 파일 수정 시각)이 바뀌면 캐시가 자동으로 무효화됨 (Home의 load_merged와 같은 방식)
+    @st.cache_data(ttl=3600, show_spinner=False)
+    def _build_analysis_data(_self, ticker: str, period_years: int = 15, data_version: float = 0.0) -> pd.DataFrame:
+        # 1. 데이터 로드
+        # 서로 독립적인 I/O(파일 읽기, 캐시 미스 시 네트워크 조회)를 스레드로 동시에 -> 대기 시간 = 합이 아니라 최댓값
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            f_stock = ex.submit(_self.repo.get_data, f"stock_{ticker}.parquet", _self.stock_loader, ticker=ticker, start_date="1990-01-01")
+            f_forex = ex.submit(_self.repo.get_data, "forex_usdkrw.parquet", _self.stock_loader, ticker=TICKER_USDKRW, start_date="1990-01-01")
+            f_dxy = ex.submit(_self.repo.get_data, "forex_dxy.parquet", _self.stock_loader, ticker=TICKER_DXY, start_date="1990-01-01")
+            f_gwcpi = ex.submit(_self.gwcpi_processor.get_gwcpi) # 이건 '상승률(%)' 데이터임
+            df_stock, df_forex, df_dxy, df_gwcpi = f_stock.result(), f_forex.result(), f_dxy.result(), f_gwcpi.result()
+        if df_stock.empty: raise _NoStockData(ticker)
 
         # --- 병합 및 전처리 ---
-        df_stock['date'] = pd.to_datetime(df_stock['date'])
-        df_merged = df_stock.set_index('date').sort_index()
+        # 컬럼별 pandas join/ffill 대신, 날짜 정렬된 NumPy 배열로 한 번씩만 계산하고 마지막에 DataFrame으로 조립
+        # (Repository가 Parquet 캐시/로더 반환값 모두 date를 datetime64로 맞춰서 주므로 네 입력 모두 문자열 재파싱 불필요)
+        df_stock = _ensure_sorted(df_stock) # 저장 시점에 이미 정렬됨 -> 정렬 생략 (확인만)
+        dates = df_stock['date'].to_numpy()
+        n = len(dates)
+        # 가격/환율 계열은 float32로 (유효숫자 7자리면 충분, 메모리/대역폭 절반)
+        close = _ffill(df_stock['close'].to_numpy(dtype=np.float32))
         
-        # 환율/DXY 채우기
+        # 환율/DXY 채우기 (주가 날짜 시점의 최근 값을 as-of 병합 -> 그래도 없으면 기본값)
         if not df_forex.empty:
-            df_forex['date'] = pd.to_datetime(df_forex['date'])
-            df_forex = df_forex.set_index('date').rename(columns={'close': 'usdkrw'})
-            df_merged = df_merged.join(df_forex['usdkrw'], how='left').ffill().fillna(1200)
+            df_forex = _ensure_sorted(df_forex)
+            usdkrw = _fill_const(_align_asof(dates, df_forex['date'].to_numpy(), df_forex['close'].to_numpy(dtype=np.float32)), 1200.0)
         else:
-            df_merged['usdkrw'] = 1200
+            usdkrw = np.full(n, 1200.0, dtype=np.float32)
 
         if not df_dxy.empty:
-            df_dxy['date'] = pd.to_datetime(df_dxy['date'])
-            df_dxy = df_dxy.set_index('date').rename(columns={'close': 'dxy'})
-            df_merged = df_merged.join(df_dxy['dxy'], how='left').ffill().fillna(100)
+            df_dxy = _ensure_sorted(df_dxy)
+            dxy = _fill_const(_align_asof(dates, df_dxy['date'].to_numpy(), df_dxy['close'].to_numpy(dtype=np.float32)), 100.0)
         else:
-            df_merged['dxy'] = 100
+            dxy = np.full(n, 100.0, dtype=np.float32)
+
+        columns = {'close': close}
+        if 'volume' in df_stock.columns: # 거래량은 7자리를 넘는 정수라 float64 유지
+            columns['volume'] = _ffill(df_stock['volume'].to_numpy(dtype=np.float64))
+        columns['usdkrw'] = usdkrw
+        columns['dxy'] = dxy
 
         # -----------------------------------------------------------
         # 💸 [로직 수정] 상승률(Rate) -> 지수(Index)로 변환
         # -----------------------------------------------------------
+        close_real = close
         if not df_gwcpi.empty:
-            df_gwcpi['date'] = pd.to_datetime(df_gwcpi['date'])
-            df_gwcpi = df_gwcpi.set_index('date').sort_index()
+            df_gwcpi = _ensure_sorted(df_gwcpi)
             
-            # 1. 주가 데이터에 병합
-            df_merged = df_merged.join(df_gwcpi['gwcpi'], how='left')
-            
-            # 2. 물가상승률(%) 선형 보간 (부드럽게 이어주기)
+            # 1~2. 물가상승률(%)을 주가 날짜에 맞춰 선형 보간 (부드럽게 이어주기)
             # gwcpi 컬럼은 "작년 대비 3% 올랐어" 같은 '속도'임
-            df_merged['gwcpi'] = df_merged['gwcpi'].replace(0, np.nan).interpolate(method='time').ffill().bfill()
-            
-            # 3. [핵심] 일별 상승 계수(Factor) 만들기
-            # 연율 3% -> 일율 (1.03)^(1/365)
-            # 100을 나누는 이유는 %단위이기 때문 (3.0 -> 0.03)
-            df_merged['daily_inflation_factor'] = (1 + df_merged['gwcpi'] / 100) ** (1/365)
-            
-            # 4. 누적 곱으로 '물가 지수(Index)' 생성
-            # 1.0 * 1.0001 * 1.0001 ... = 1.5 (누적된 물가 높이)
-            df_merged['cpi_index'] = df_merged['daily_inflation_factor'].cumprod()
-            
-            # 5. 실질 주가 계산 (현재 가치 기준 환산)
-            # 공식: 과거주가 * (현재물가지수 / 과거물가지수)
-            # 의미: 옛날 100원은 물가 2배 오른 지금의 200원과 같다.
-            if not df_merged['cpi_index'].dropna().empty:
-                current_index = df_merged['cpi_index'].iloc[-1]
-                
-                # Scaling Factor: (현재지수 / 과거지수)
-                # 과거지수가 1.0이고 현재가 2.0이면 -> Factor는 2.0
-                # 과거주가 100원 * 2.0 = 실질주가 200원 (맞음)
-                df_merged['cpi_adjustment_factor'] = current_index / df_merged['cpi_index']
-                df_merged['close_real'] = df_merged['close'] * df_merged['cpi_adjustment_factor']
+            # 별도 병합 없이 GWCPI 자체 날짜(ns 정수) 축에서 주가 날짜로 np.interp 한 번
+            # (주말/휴장일에 찍힌 월별 값도 버리지 않음, 0은 결측 취급, 범위 밖은 양 끝 값으로 평평하게 연장)
+            g_dates = df_gwcpi['date'].to_numpy()
+            g_vals = df_gwcpi['gwcpi'].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(g_vals) & (g_vals != 0)
+            if valid.any():
+                # 두 날짜 배열의 단위(ns/us 등)가 다를 수 있으므로 ns로 맞춘 뒤 정수로 해석
+                gwcpi = np.interp(
+                    dates.astype('datetime64[ns]').view(np.int64),
+                    g_dates[valid].astype('datetime64[ns]').view(np.int64),
+                    g_vals[valid],
+                )
+
+                # 3~5. 일별 상승 계수 -> 누적 '물가 지수(Index)' -> 실질 주가 (현재 가치 기준 환산)를 JIT 커널 한 번으로 계산
+                # 연율 3% -> 일율 (1.03)^(1/365), 1.0 * 1.0001 * 1.0001 ... = 1.5 (누적된 물가 높이, 커널 내부에서는 로그 합)
+                # 공식: 과거주가 * (현재물가지수 / 과거물가지수)
+                # 의미: 옛날 100원은 물가 2배 오른 지금의 200원과 같다.
+                # (중간 계수/지수는 화면에서 쓰지 않으므로 컬럼으로 만들지 않음 -> 반환/캐시 프레임 축소)
+                close_real = _real_close_kernel(close, gwcpi)
             else:
-                df_merged['close_real'] = df_merged['close']
+                gwcpi = np.full(n, np.nan)
+            columns['gwcpi'] = gwcpi.astype(np.float32)
         else:
-            df_merged['close_real'] = df_merged['close']
+            columns['gwcpi'] = np.full(n, np.nan, dtype=np.float32) # 물가 데이터가 없어도 반환 스키마(_SCHEMA)는 동일하게
+        columns['close_real'] = close_real
 
         # -----------------------------------------------------------
         # 💱 환율/통화 영향 제거 (Tab 2)
@@ -88,29 +194,29 @@ class StockAnalysisProcessor:
         # 오늘 날짜에 맞추지(Scaling) 않고, '표준 상태'일 때의 가격을 산출하여
         # 현재 가격과의 'Gap'을 그대로 노출시킴.
         # -----------------------------------------------------------
-        is_kr_stock = ticker.upper().endswith('.KS') or ticker.upper().endswith('.KQ') or ticker.isdigit()
+        t = ticker.upper() # 대문자 변환은 한 번만, 접미사 검사는 튜플로 한 번에
+        is_kr_stock = t.endswith(('.KS', '.KQ')) or t.isdigit()
         
-        # 1. DXY Factor (기준: 100)
+        # 1. DXY Factor (기준: 100) = dxy / 100 (아래 식에 상수로 합쳐 곱함)
         # 100일 때가 '정상'. 높으면 달러 강세, 낮으면 달러 약세.
-        dxy_factor = df_merged['dxy'] / 100
         
         if is_kr_stock:
             # [한국 주식]
             # 기준: 지난 10년 평균 환율 (Moving Average가 아니라 전체 기간 평균 상수 사용)
             # 이유: "환율이 평소(평균)대로 돌아온다면 얼마일까?"를 보기 위함.
-            historical_avg_rate = df_merged['usdkrw'].mean() 
-            if np.isnan(historical_avg_rate): historical_avg_rate = 1200
-            
-            # 1단계: 달러 환산
-            price_in_usd = df_merged['close'] / df_merged['usdkrw']
+            # NumPy 배열에서 바로 nanmean (합산은 float64로, 결과는 파이썬 float -> float32 배열 dtype 유지)
+            historical_avg_rate = float(np.nanmean(usdkrw, dtype=np.float64)) if usdkrw.size else 1200.0
+            if np.isnan(historical_avg_rate): historical_avg_rate = 1200.0
             
+            # 1단계: 달러 환산 (close / usdkrw)
             # 2단계: DXY 및 평균 환율 적용
             # 공식: (달러가격 * DXY) * 평균환율
             # 의미: 글로벌 가치(USD * DXY)를 한국 평균 환율로 다시 환전.
             # 이러면 "환율 거품"과 "달러 거품"이 모두 빠진 '평소 한국 돈' 기준 가격이 나옴.
-            df_merged['close_currency_neutral'] = (price_in_usd * dxy_factor) * historical_avg_rate
+            # 나눗셈/곱셈을 JIT 커널 한 루프로 합침 (상수 곱은 하나로: 평균환율 / 100)
+            columns['close_currency_neutral'] = _neutral_krw_kernel(close, usdkrw, dxy, historical_avg_rate / 100)
             
-            df_merged['currency_label'] = f'Fair Value (Base: {historical_avg_rate:.0f}₩, DXY 100)'
+            columns['currency_label'] = f'Fair Value (Base: {historical_avg_rate:.0f}₩, DXY 100)'
             
         else:
             # [미국 주식]
@@ -119,8 +225,11 @@ class StockAnalysisProcessor:
             # 의미: "만약 달러 인덱스가 100(정상)이었다면, 이 주가는 얼마였을까?"
             # DXY가 106(강세)이라면 -> 주가는 원래 더 비싸야 함 (1.06배) -> 억눌려 있음.
             # DXY가 90(약세)이라면 -> 주가는 원래 더 싸야 함 (0.9배) -> 부풀려 있음.
-            df_merged['close_currency_neutral'] = df_merged['close'] * dxy_factor
+            neutral = np.multiply(close, dxy)
+            neutral /= 100
+            columns['close_currency_neutral'] = neutral
             
-            df_merged['currency_label'] = 'Fair Value (Base: DXY 100)'
+            columns['currency_label'] = 'Fair Value (Base: DXY 100)'
 
-        return df_merged.reset_index()
\ No newline at end of file
+        # 최종 조립 (DataFrame은 여기서 한 번만 생성)
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(dates, name='date')).reset_index()
\ No newline at end of file
@@ -1,55 +1,62 @@
 import pandas as pd
+import numpy as np
 import streamlit as st
 from src.database import DataRepository
 from src.loaders.ticker_loader import TickerListLoader
 
+def _build_ticker_map(df: pd.DataFrame) -> dict:
+    """
+    티커 데이터프레임 -> UI 검색용 딕셔너리 { "이름 (코드)": "실제티커" }
+    - 캐싱은 호출하는 쪽(종목 분석 페이지의 load_ticker_options, 티커 파일 버전 키) 한 곳에서만
+    """
+    ticker_map = {}
+    try:
+        # 데이터프레임 -> 딕셔너리 변환 (속도 최적화)
+        # 행 단위 파이썬 루프 대신 컬럼 전체를 NumPy 문자열 연산으로 한 번에 만들고 마지막에 zip 한 번
+        code = df['Code'].to_numpy().astype(str)
+        name = df['Name'].to_numpy().astype(str)
+        is_kr = df['Country'].to_numpy() == 'KR'
+        is_kosdaq = df['Market'].to_numpy() == 'KOSDAQ'
+
+        # yfinance용 티커 변환 (KOSDAQ -> .KQ, KOSPI 등 -> .KS, 해외는 그대로)
+        suffix = np.where(is_kr, np.where(is_kosdaq, '.KQ', '.KS'), '')
+        full_ticker = np.char.add(code, suffix)
+
+        # 표시 이름 (Flag 추가): "🇰🇷 삼성전자 (005930)"
+        flag = np.where(is_kr, "🇰🇷 ", "🇺🇸 ")
+        display_name = np.char.add(np.char.add(np.char.add(flag, name), " ("), np.char.add(code, ")"))
+
+        ticker_map = dict(zip(display_name.tolist(), full_ticker.tolist()))
+            
+    except Exception as e:
+        print(f"티커 맵 변환 중 오류: {e}")
+        
+    return ticker_map
+
+
 class TickerManager:
     def __init__(self, repo: DataRepository):
         self.repo = repo
         self.loader = TickerListLoader()
+        self.filename = "all_tickers.parquet"
         
-    @st.cache_data(ttl=3600*24) # UI용 딕셔너리 생성은 메모리에 캐싱
-    def get_ticker_map(_self):
+    def get_ticker_map(self):
         """
         DataRepository를 통해 티커 데이터를 가져와서
         UI 검색용 딕셔너리 { "이름 (코드)": "실제티커" } 로 변환합니다.
         """
-        # ✅ DataRepository 사용! (파일명: all_tickers.csv)
+        # ✅ DataRepository 사용! (파일명: all_tickers.parquet)
         # check_interval_days=30: 한 달에 한 번만 갱신 (주식 종목이 매일 바뀌진 않으므로)
-        df = _self.repo.get_data(
-            filename="all_tickers.csv",
-            loader=_self.loader,
+        df = self.repo.get_data(
+            filename=self.filename,
+            loader=self.loader,
             check_interval_days=30 
         )
         
         if df.empty:
             return {}
         
-        ticker_map = {}
-        try:
-            # 데이터프레임 -> 딕셔너리 변환 (속도 최적화)
-            # iterrows보다 zip이 훨씬 빠릅니다.
-            for code, name, market, country in zip(df['Code'], df['Name'], df['Market'], df['Country']):
-                
-                # yfinance용 티커 변환
-                full_ticker = code
-                if country == 'KR':
-                    if market == 'KOSDAQ':
-                        full_ticker = f"{code}.KQ"
-                    else: # KOSPI 등
-                        full_ticker = f"{code}.KS"
-                
-                # 표시 이름 (Flag 추가)
-                flag = "🇰🇷" if country == 'KR' else "🇺🇸"
-                # 이름이 너무 길면 자르거나, 특수문자 처리 (선택)
-                display_name = f"{flag} {name} ({code})"
-                
-                ticker_map[display_name] = full_ticker
-                
-        except Exception as e:
-            print(f"티커 맵 변환 중 오류: {e}")
-            
-        return ticker_map
+        return _build_ticker_map(df)
 
     def force_update(self):
         """
@@ -62,9 +69,15 @@ class TickerManager:
         # 현재 Repo 구조에서는 파일을 삭제하는 게 가장 확실함.
         import os
         from src.config import DATA_DIR
-        file_path = os.path.join(DATA_DIR, "all_tickers.csv")
+        file_path = os.path.join(DATA_DIR, self.filename)
+        # 삭제 대신 원자적 이름 변경으로 먼저 치워둠 (os.replace)
+        # -> 다른 세션이 그 사이에 읽어도 '파일 없음'만 보게 되어 다시 받는 건 한 번뿐
+        stale_path = file_path + '.stale'
         if os.path.exists(file_path):
-            os.remove(file_path)
+            os.replace(file_path, stale_path)
             
         # 캐시 초기화 후 다시 get_ticker_map 호출 유도
-        st.cache_data.clear()
\ No newline at end of file
+        st.cache_data.clear()
+
+        try: os.remove(stale_path)
+        except OSError: pass
\ No newline at end of file
@@ -0,0 +1,75 @@
+import json
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from src.database import DataRepository
+
+
+class _FakeApi:
+    """HF 업로드 대신 호출만 기록"""
+    def __init__(self):
+        self.commits = []
+
+    def create_commit(self, **kwargs):
+        self.commits.append([op.path_in_repo for op in kwargs['operations']])
+
+    def hf_hub_download(self, **kwargs):
+        raise RuntimeError("offline")
+
+
+class _GatedLoader:
+    """테스트가 release를 set 할 때까지 응답을 붙잡아 두는 로더 (호출자 쪽 변경을 먼저 일으키기 위함)"""
+    def __init__(self):
+        self.release = threading.Event()
+
+    def fetch_data(self, start_date=None, end_date=None, **kwargs):
+        self.release.wait(5)
+        dates = pd.date_range(start_date, datetime.now().date())
+        return pd.DataFrame({'date': dates, 'close': 1.0})
+
+
+class BackgroundRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = DataRepository()
+        self.repo.data_dir = Path(self.tmp.name)
+        self.repo.api = _FakeApi()
+
+    def tearDown(self):
+        self.repo._flush_uploads()
+        self.tmp.cleanup()
+
+    def test_refresh_survives_caller_mutating_returned_frame(self):
+        filename = "macro_test.parquet"
+        file_path = self.repo.data_dir / filename
+        meta_path = self.repo.data_dir / f"{filename}.meta.json"
+
+        # 10일 전까지만 있는 데이터 + 쿨타임이 지난 메타
+        last_day = pd.Timestamp(datetime.now().date() - timedelta(days=10))
+        pd.DataFrame({'date': pd.date_range(end=last_day, periods=30), 'close': 0.5}).to_parquet(file_path, index=False)
+        meta_path.write_text(json.dumps({"last_checked": "2000-01-01T00:00:00"}))
+
+        loader = _GatedLoader()
+        df = self.repo.get_data(filename, loader, check_interval_days=7)
+
+        # 호출자가 돌려받은 프레임을 제자리에서 변경 (GWCPIProcessor 등의 패턴)
+        df.set_index('date', inplace=True)
+        loader.release.set()
+        self.repo._refresh_pool.shutdown(wait=True)
+
+        saved = pd.read_parquet(file_path)
+        self.assertEqual(saved['date'].max(), pd.Timestamp(datetime.now().date()))
+        self.assertTrue(saved['date'].is_unique)
+
+        meta = json.loads(meta_path.read_text())
+        self.assertGreater(datetime.fromisoformat(meta["last_checked"]), datetime.now() - timedelta(minutes=1))
+        self.assertEqual(pd.Timestamp(meta["max_date"]), saved['date'].max())
+
+
+if __name__ == "__main__":
+    unittest.main()